@@ -0,0 +1,215 @@
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+from typing import Tuple, Union
+
+from ArrayGraph import ArrayGraph
+from Graph import Graph
+from Node import Node
+from Path import Path
+
+positive_infinity = float('inf')
+
+"""
+Split the nodes of the graph in a number of cells growing them with a breadth first search.
+
+The edges are considered undirected. The seeds of the cells are chosen far from each other: each new seed is
+the node with the highest number of hops from the seeds already chosen. Then all the cells grow at the same
+speed, one BFS level at a time, so the cells have a similar number of nodes.
+Nodes that can not be reached from any seed start a new BFS in the smallest cell.
+
+:return
+    an array with the cell of each node, indexed as the nodes of the ArrayGraph
+"""
+
+
+def bfs_partition(graph: ArrayGraph, number_of_cells: int) -> array:
+    if number_of_cells < 1:
+        raise ValueError("the number of cells must be at least one")
+    neighbours = [[] for _ in range(len(graph))]
+    offsets = graph.get_offsets()
+    destinations = graph.get_destinations()
+    for node in range(len(graph)):
+        for i in range(offsets[node], offsets[node + 1]):
+            neighbours[node].append(destinations[i])
+            neighbours[destinations[i]].append(node)
+
+    # choose the seeds
+    seeds = []
+    hops = [positive_infinity] * len(graph)
+    while len(seeds) < min(number_of_cells, len(graph)):
+        seed = max(range(len(graph)), key=lambda n: hops[n]) if len(seeds) > 0 else 0
+        seeds.append(seed)
+        queue = deque([seed])
+        hops[seed] = 0
+        while len(queue) > 0:
+            node = queue.popleft()
+            for neighbour in neighbours[node]:
+                if hops[node] + 1 < hops[neighbour]:
+                    hops[neighbour] = hops[node] + 1
+                    queue.append(neighbour)
+
+    # grow the cells together
+    cells = array('i', [-1]) * len(graph)
+    sizes = [0] * len(seeds)
+    frontiers = []
+    for cell, seed in enumerate(seeds):
+        cells[seed] = cell
+        sizes[cell] += 1
+        frontiers.append([seed])
+    unassigned = len(graph) - len(seeds)
+    next_free_node = 0
+    while unassigned > 0:
+        if all(len(frontier) == 0 for frontier in frontiers):
+            # a part of the graph that is not connected to any cell
+            while cells[next_free_node] != -1:
+                next_free_node += 1
+            cell = sizes.index(min(sizes))
+            cells[next_free_node] = cell
+            sizes[cell] += 1
+            unassigned -= 1
+            frontiers[cell].append(next_free_node)
+        for cell in range(len(frontiers)):
+            next_frontier = []
+            for node in frontiers[cell]:
+                for neighbour in neighbours[node]:
+                    if cells[neighbour] == -1:
+                        cells[neighbour] = cell
+                        sizes[cell] += 1
+                        unassigned -= 1
+                        next_frontier.append(neighbour)
+            frontiers[cell] = next_frontier
+    return cells
+
+
+class ArcFlags:
+    """
+    An arc flags index that prune the edges that are not useful to reach the cell of the target.
+
+    The nodes are partitioned in cells and each edge has a flag for each cell:
+    the flag of the cell C is set when the edge is in a shortest path to a node of C.
+    The flags are computed with a backward Dijkstra search from each boundary node of each cell
+    (a node of the cell with an incoming edge from another cell): the edges of its shortest path tree
+    get the flag of the cell. The edges with both the nodes in a cell always have the flag of the cell.
+
+    The flags are stored in a single bit array next to the edges of the ArrayGraph:
+    the flags of the edge i are the bits from i * number_of_cells to (i + 1) * number_of_cells (excluded).
+    """
+
+    def __init__(self, graph: Graph, number_of_cells: int):
+        self._nodes = graph.get_nodes()
+        self._graph = ArrayGraph.from_graph(graph)
+        self._number_of_cells = number_of_cells
+        self._cells = bfs_partition(self._graph, number_of_cells)
+        self._flags = bytearray((self._graph.get_number_of_edges() * number_of_cells + 7) // 8)
+        self.__compute_flags()
+
+    def get_cells(self) -> array:
+        return self._cells
+
+    def get_cell(self, node: Node) -> int:
+        return self._cells[self._graph.get_index(node)]
+
+    def __set_flag(self, edge: int, cell: int):
+        bit = edge * self._number_of_cells + cell
+        self._flags[bit >> 3] |= 1 << (bit & 7)
+
+    def has_flag(self, edge: int, cell: int) -> bool:
+        bit = edge * self._number_of_cells + cell
+        return self._flags[bit >> 3] & (1 << (bit & 7)) != 0
+
+    def __compute_flags(self):
+        offsets = self._graph.get_offsets()
+        destinations = self._graph.get_destinations()
+        cells = self._cells
+        boundary_nodes = set()
+        for node in range(len(self._graph)):
+            for i in range(offsets[node], offsets[node + 1]):
+                if cells[node] == cells[destinations[i]]:
+                    self.__set_flag(i, cells[node])
+                else:
+                    boundary_nodes.add(destinations[i])
+
+        reversed_graph, edge_indexes = self._graph.get_reversed_graph_and_edge_indexes()
+        for boundary_node in sorted(boundary_nodes):
+            self.__flag_shortest_path_tree(reversed_graph, edge_indexes, boundary_node)
+
+    """
+    Run a backward Dijkstra search from the boundary node and flag the edges of its shortest path tree
+    """
+
+    def __flag_shortest_path_tree(self, reversed_graph: ArrayGraph, edge_indexes: array, boundary_node: int):
+        offsets = reversed_graph.get_offsets()
+        destinations = reversed_graph.get_destinations()
+        costs = reversed_graph.get_costs()
+        cell = self._cells[boundary_node]
+        distances = {boundary_node: 0}
+        predecessor_edges = {}
+        heap = [(0, boundary_node)]
+        while len(heap) > 0:
+            distance, node = heappop(heap)
+            if distance > distances[node]:
+                continue
+            if node in predecessor_edges:
+                self.__set_flag(predecessor_edges[node], cell)
+            for i in range(offsets[node], offsets[node + 1]):
+                new_path_cost = distance + costs[i]
+                destination = destinations[i]
+                if new_path_cost < distances.get(destination, positive_infinity):
+                    distances[destination] = new_path_cost
+                    predecessor_edges[destination] = edge_indexes[i]
+                    heappush(heap, (new_path_cost, destination))
+
+    """
+    Find the shortest path from the source to the target with a Dijkstra search that only cross
+    the edges that have the flag of the cell of the target.
+
+    :return
+        a Tuple[Path, float] with the shortest path and its cost, (None, positive infinity) if the target is not reachable
+    """
+
+    def get_shortest_path(self, source: Node, target: Node) -> Tuple[Union[Path, None], float]:
+        offsets = self._graph.get_offsets()
+        destinations = self._graph.get_destinations()
+        costs = self._graph.get_costs()
+        source_index = self._graph.get_index(source)
+        target_index = self._graph.get_index(target)
+        target_cell = self._cells[target_index]
+
+        distances = {source_index: 0}
+        predecessors = {source_index: None}
+        heap = [(0, source_index)]
+        while len(heap) > 0:
+            distance, node = heappop(heap)
+            if distance > distances[node]:
+                continue
+            if node == target_index:
+                nodes = []
+                while node is not None:
+                    nodes.append(self._nodes[node])
+                    node = predecessors[node]
+                nodes.reverse()
+                return Path.from_nodes(nodes), distance
+            for i in range(offsets[node], offsets[node + 1]):
+                if not self.has_flag(i, target_cell):
+                    continue
+                new_path_cost = distance + costs[i]
+                destination = destinations[i]
+                if new_path_cost < distances.get(destination, positive_infinity):
+                    distances[destination] = new_path_cost
+                    predecessors[destination] = node
+                    heappush(heap, (new_path_cost, destination))
+        return None, positive_infinity
+
+    def get_distance(self, source: Node, target: Node) -> float:
+        return self.get_shortest_path(source, target)[1]
+
+    """
+    Return the fraction of the flags that are set, a lower value means a stronger pruning
+    """
+
+    def get_flags_density(self) -> float:
+        total = self._graph.get_number_of_edges() * self._number_of_cells
+        if total == 0:
+            return 0.0
+        return sum(bin(byte).count('1') for byte in self._flags) / total
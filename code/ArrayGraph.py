@@ -0,0 +1,131 @@
+from array import array
+from heapq import heappush, heappop
+from typing import List, Sequence, Tuple, Union
+
+from Graph import Graph
+from Node import Node
+
+positive_infinity = float('inf')
+
+
+class ArrayGraph:
+    """
+    A compact, read only, representation of a Graph in compressed sparse row (CSR) format.
+
+    The nodes are identified by their index in the node list of the original graph.
+    The edges that exit from the node i are stored from offsets[i] to offsets[i + 1] (excluded) in:
+        - destinations: the index of the node where the edge arrive
+        - costs: the cost to cross the edge
+    The three sequences can be arrays, memoryviews or any other indexable sequence of numbers,
+    so that the same graph can be backed by a shared memory block.
+    """
+
+    def __init__(self, names: Union[List[str], None], offsets: Sequence[int], destinations: Sequence[int],
+                 costs: Sequence[float]):
+        if len(offsets) == 0 or offsets[len(offsets) - 1] != len(destinations) or len(destinations) != len(costs):
+            raise ValueError('offsets, destinations and costs do not describe a valid CSR graph')
+        self._names = names
+        self._offsets = offsets
+        self._destinations = destinations
+        self._costs = costs
+        self._indexes = None if names is None else {name: i for i, name in enumerate(names)}
+
+    """
+    Build the CSR representation of a graph. The index of a node is its position in graph.get_nodes()
+    """
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> 'ArrayGraph':
+        nodes = graph.get_nodes()
+        indexes = {node.get_name(): i for i, node in enumerate(nodes)}
+        offsets = array('q', [0])
+        destinations = array('q')
+        costs = array('d')
+        for node in nodes:
+            for edge in node.get_edges():
+                destinations.append(indexes[edge.get_destination().get_name()])
+                costs.append(edge.get_cost())
+            offsets.append(len(destinations))
+        return cls([node.get_name() for node in nodes], offsets, destinations, costs)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def get_names(self) -> Union[List[str], None]:
+        return self._names
+
+    def get_offsets(self) -> Sequence[int]:
+        return self._offsets
+
+    def get_destinations(self) -> Sequence[int]:
+        return self._destinations
+
+    def get_costs(self) -> Sequence[float]:
+        return self._costs
+
+    def get_number_of_edges(self) -> int:
+        return len(self._destinations)
+
+    def get_index(self, node: Union[Node, str]) -> int:
+        if self._indexes is None:
+            raise RuntimeError("this ArrayGraph does not store the node names")
+        name = node if isinstance(node, str) else node.get_name()
+        return self._indexes[name]
+
+    """
+    Return the reversed graph in CSR format, the node indexes are the same of this graph.
+    """
+
+    def get_reversed_graph(self) -> 'ArrayGraph':
+        return self.get_reversed_graph_and_edge_indexes()[0]
+
+    """
+    Return the reversed graph and, for each of its edges, the index of the edge of this graph that it reverses.
+    """
+
+    def get_reversed_graph_and_edge_indexes(self) -> Tuple['ArrayGraph', array]:
+        counts = [0] * (len(self) + 1)
+        for destination in self._destinations:
+            counts[destination + 1] += 1
+        offsets = array('q', [0] * (len(self) + 1))
+        for i in range(len(self)):
+            offsets[i + 1] = offsets[i] + counts[i + 1]
+        destinations = array('q', [0] * len(self._destinations))
+        costs = array('d', [0.0] * len(self._costs))
+        edge_indexes = array('q', [0] * len(self._destinations))
+        next_free = list(offsets[:len(self)])
+        for node in range(len(self)):
+            for i in range(self._offsets[node], self._offsets[node + 1]):
+                position = next_free[self._destinations[i]]
+                destinations[position] = node
+                costs[position] = self._costs[i]
+                edge_indexes[position] = i
+                next_free[self._destinations[i]] += 1
+        return ArrayGraph(self._names, offsets, destinations, costs), edge_indexes
+
+    """
+    Find the min distance from the source node (an index) to all the nodes in the graph.
+
+    :return
+        an array of distances indexed by node, unreachable nodes are at positive infinity
+    """
+
+    def get_distances(self, source: int) -> array:
+        offsets = self._offsets
+        destinations = self._destinations
+        costs = self._costs
+        distances = array('d', [positive_infinity]) * len(self)
+        distances[source] = 0.0
+        heap = [(0.0, source)]
+        while len(heap) > 0:
+            distance, node = heappop(heap)
+            if distance > distances[node]:
+                # an outdated entry, the node has already been settled with a lower distance
+                continue
+            for i in range(offsets[node], offsets[node + 1]):
+                new_path_cost = distance + costs[i]
+                destination = destinations[i]
+                if new_path_cost < distances[destination]:
+                    distances[destination] = new_path_cost
+                    heappush(heap, (new_path_cost, destination))
+        return distances
@@ -0,0 +1,233 @@
+import argparse
+import sys
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterator, List, TextIO, Tuple, Union
+
+from GraphFile import load_graph, save_graph
+from Graph import Graph
+from Node import Node
+
+"""
+Command line entry point to answer a stream of shortest path queries on a graph.
+
+The graph (see GraphFile for the format) is loaded once, then the queries are read one per line
+as 'source target' from a file or from the standard input and the results are written as soon as they are ready,
+in chunks of lines, as 'source<TAB>target<TAB>distance<TAB>path'. At the end some throughput and latency
+statistics are written on the standard error.
+The paths of the ch algorithm are written with the edges of the graph: each shortcut is expanded
+in the edges that it bypasses.
+
+The modules of the algorithms are imported only when the algorithm is selected, so small runs start fast.
+
+With --profile the loading, the preprocessing and the queries run as phases of a Profiler (see Profiling)
+and a JSON report is written. For the ch algorithm without a preprocessed file the report also has
+the time and the memory of each contraction level.
+
+Example:
+    python BatchQuery.py graph.txt --algorithm ch --preprocessed shortcuts.txt --queries queries.txt
+"""
+
+ALGORITHMS = ['plain', 'bidirectional', 'ch']
+
+# a query function return the distance from the source to the target and the path, None if there is no path
+QueryFunction = Callable[[Node, Node], Tuple[Union[int, float], Union['Path', None]]]
+
+
+def __build_plain(graph: Graph) -> Tuple[Graph, QueryFunction]:
+    from Dijkstra import DijkstraWorkspace
+
+    workspace = DijkstraWorkspace(graph)
+
+    def query(source: Node, target: Node):
+        workspace.run(source, target)
+        return workspace.get_distance(target), workspace.get_path(target)
+
+    return graph, query
+
+
+def __build_bidirectional(graph: Graph) -> Tuple[Graph, QueryFunction]:
+    from Dijkstra import bidirectional_dijkstra
+
+    def query(source: Node, target: Node):
+        path = bidirectional_dijkstra(graph, source, target)[0]
+        return (float('inf'), None) if path is None else (path.get_total_cost(), path)
+
+    return graph, query
+
+
+def __build_ch(graph_with_shortcuts: Graph) -> Tuple[Graph, QueryFunction]:
+    graph_with_shortcuts, bidirectional_query = __build_bidirectional(graph_with_shortcuts)
+
+    def query(source: Node, target: Node):
+        # the path found on the graph with the shortcuts is written with the edges of the graph
+        distance, path = bidirectional_query(source, target)
+        return distance, None if path is None else path.expand_shortcuts()
+
+    return graph_with_shortcuts, query
+
+
+"""
+Return an edge (source name, destination name) of the preprocessed graph that is not a shortcut
+and is not an edge of the graph with the same cost, None if there is no such edge.
+A file written before the shortcuts recorded the node they bypass has shortcuts that look like edges,
+the paths that cross them can not be expanded.
+"""
+
+
+def __find_unexpandable_edge(graph: Graph, graph_with_shortcuts: Graph) -> Union[Tuple[str, str], None]:
+    nodes = {node.get_name(): node for node in graph.get_nodes()}
+    for node in graph_with_shortcuts.get_nodes():
+        for edge in node.get_edges():
+            if edge.get_middle_node() is not None:
+                continue
+            original_node = nodes.get(node.get_name())
+            original_edge = None if original_node is None else original_node.get_edge(edge.get_destination())
+            if original_edge is None or original_edge.get_cost() != edge.get_cost():
+                return node.get_name(), edge.get_destination().get_name()
+    return None
+
+
+def __load_graph_with_shortcuts(graph: Graph, preprocessed_path: Union[str, None],
+                                save_preprocessed_path: Union[str, None], processes: Union[int, None]) -> Graph:
+    if preprocessed_path is not None:
+        graph_with_shortcuts = load_graph(preprocessed_path)
+    else:
+        graph_with_shortcuts = graph.add_shortcuts(processes)
+    if save_preprocessed_path is not None:
+        save_graph(graph_with_shortcuts, save_preprocessed_path)
+    return graph_with_shortcuts
+
+
+def __read_queries(file: TextIO) -> Iterator[Tuple[int, List[str]]]:
+    for line_number, line in enumerate(file, start=1):
+        fields = line.split()
+        if len(fields) == 0 or fields[0].startswith('#'):
+            continue
+        yield line_number, fields
+
+
+def __format_result(source: str, target: str, distance: Union[int, float], path, distance_only: bool) -> str:
+    if isinstance(distance, float) and distance.is_integer():
+        # the array based searches return floats, write them as the costs in the graph file
+        distance = int(distance)
+    if distance_only or path is None:
+        return f"{source}\t{target}\t{distance}\n"
+    return f"{source}\t{target}\t{distance}\t" + ",".join(node.get_name() for node in path.get_nodes()) + "\n"
+
+
+def __percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def __write_statistics(latencies: List[float], errors: int, elapsed: float, file: TextIO):
+    file.write(f"queries: {len(latencies)}, errors: {errors}, elapsed: {elapsed:.3f} s, "
+               f"throughput: {len(latencies) / elapsed if elapsed > 0 else 0:.1f} queries/s\n")
+    if len(latencies) > 0:
+        latencies = sorted(latencies)
+        file.write("latency ms: "
+                   f"mean {1000 * sum(latencies) / len(latencies):.3f}, "
+                   f"p50 {1000 * __percentile(latencies, 0.5):.3f}, "
+                   f"p95 {1000 * __percentile(latencies, 0.95):.3f}, "
+                   f"p99 {1000 * __percentile(latencies, 0.99):.3f}, "
+                   f"max {1000 * latencies[len(latencies) - 1]:.3f}\n")
+
+
+def parse_arguments(argv: List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Answer a stream of shortest path queries on a graph file.")
+    parser.add_argument('graph', help="the graph file, one 'source destination cost' edge per line")
+    parser.add_argument('--algorithm', '-a', choices=ALGORITHMS, default='plain',
+                        help="plain Dijkstra, bidirectional Dijkstra or bidirectional Dijkstra on the graph "
+                             "with the shortcuts of the contraction hierarchies (default: plain)")
+    parser.add_argument('--preprocessed', '-p', help="the graph with the shortcuts, used by the ch algorithm "
+                                                     "instead of computing them at startup")
+    parser.add_argument('--save-preprocessed', help="write the graph with the shortcuts to this file")
+    parser.add_argument('--processes', type=int, help="compute the shortcuts of the ch algorithm in parallel rounds "
+                                                      "on this number of processes")
+    parser.add_argument('--queries', '-q', default='-', help="the file of the 'source target' queries, "
+                                                             "- for the standard input (default)")
+    parser.add_argument('--output', '-o', default='-', help="the result file, - for the standard output (default)")
+    parser.add_argument('--chunk-size', type=int, default=1024, help="number of results written at once")
+    parser.add_argument('--distance-only', action='store_true', help="do not write the paths")
+    parser.add_argument('--profile', metavar='REPORT', help="profile time and memory of each phase "
+                                                            "and write a JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None) -> int:
+    arguments = parse_arguments(argv)
+    if arguments.chunk_size < 1:
+        sys.stderr.write("--chunk-size must be at least 1\n")
+        return 2
+    if arguments.processes is not None and arguments.processes < 1:
+        sys.stderr.write("--processes must be at least 1\n")
+        return 2
+
+    profiler = None
+    if arguments.profile is not None:
+        from Profiling import Profiler
+        profiler = Profiler()
+
+    def phase(name: str):
+        return nullcontext() if profiler is None else profiler.phase(name)
+
+    with phase('load_graph'):
+        graph = load_graph(arguments.graph)
+    if profiler is not None and arguments.algorithm == 'ch' and arguments.preprocessed is None:
+        profiler.profile_contraction_levels(graph)
+    with phase('preprocess'):
+        if arguments.algorithm == 'plain':
+            graph, query = __build_plain(graph)
+        elif arguments.algorithm == 'bidirectional':
+            graph, query = __build_bidirectional(graph)
+        else:
+            graph_with_shortcuts = __load_graph_with_shortcuts(graph, arguments.preprocessed,
+                                                               arguments.save_preprocessed, arguments.processes)
+            if arguments.preprocessed is not None and not arguments.distance_only:
+                unexpandable_edge = __find_unexpandable_edge(graph, graph_with_shortcuts)
+                if unexpandable_edge is not None:
+                    sys.stderr.write(f"{arguments.preprocessed}: the edge {unexpandable_edge[0]} -> "
+                                     f"{unexpandable_edge[1]} is not an edge of the graph and does not record "
+                                     f"the node that it bypasses, save the file again with --save-preprocessed "
+                                     f"or use --distance-only\n")
+                    return 2
+            graph, query = __build_ch(graph_with_shortcuts)
+    nodes: Dict[str, Node] = {node.get_name(): node for node in graph.get_nodes()}
+
+    queries_file = sys.stdin if arguments.queries == '-' else open(arguments.queries)
+    output_file = sys.stdout if arguments.output == '-' else open(arguments.output, 'w', buffering=1 << 20)
+    latencies = []
+    errors = 0
+    chunk = []
+    start = time.perf_counter()
+    with phase('queries'):
+        try:
+            for line_number, fields in __read_queries(queries_file):
+                if len(fields) != 2 or fields[0] not in nodes or fields[1] not in nodes:
+                    errors += 1
+                    sys.stderr.write(f"line {line_number}: invalid query {' '.join(fields)!r}\n")
+                    continue
+                query_start = time.perf_counter()
+                distance, path = query(nodes[fields[0]], nodes[fields[1]])
+                latencies.append(time.perf_counter() - query_start)
+                chunk.append(__format_result(fields[0], fields[1], distance, path, arguments.distance_only))
+                if len(chunk) >= arguments.chunk_size:
+                    output_file.write(''.join(chunk))
+                    output_file.flush()
+                    chunk.clear()
+            output_file.write(''.join(chunk))
+            output_file.flush()
+        finally:
+            if queries_file is not sys.stdin:
+                queries_file.close()
+            if output_file is not sys.stdout:
+                output_file.close()
+
+    __write_statistics(latencies, errors, time.perf_counter() - start, sys.stderr)
+    if profiler is not None:
+        profiler.write_report(arguments.profile)
+    return 0 if errors == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -80,6 +80,9 @@ class BinaryMinHeap(Generic[T]):
         return self._A[self._size]
 
     def _build_heap(self) -> None:
+        if self._size <= 1:
+            # an empty heap or a single key are already a heap
+            return
         for i in range(BinaryMinHeap.parent(self._size - 1), -1, -1):
             self._heapify(i)
 
@@ -0,0 +1,249 @@
+from heapq import heappush, heappop
+from math import floor
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from ArrayGraph import ArrayGraph
+from Dijkstra import DijkstraResult
+from Graph import Graph
+from Node import Node
+
+positive_infinity = float('inf')
+
+"""
+The buckets with at most this number of entries are processed one node at a time in Python:
+for a small bucket the fixed cost of the NumPy calls is higher than the cost of the relaxations.
+"""
+SMALL_BUCKET_SIZE = 64
+
+
+def _to_csr(sources: np.ndarray, destinations: np.ndarray, costs: np.ndarray,
+            number_of_nodes: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    order = np.argsort(sources, kind='stable')
+    offsets = np.zeros(number_of_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=number_of_nodes), out=offsets[1:])
+    return offsets, destinations[order], costs[order]
+
+
+"""
+Return (source, destination, cost) of all the edges that exit from the nodes
+"""
+
+
+def _gather_edges(nodes: np.ndarray, csr: Tuple[np.ndarray, np.ndarray, np.ndarray]) \
+        -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    offsets, destinations, costs = csr
+    starts = offsets[nodes]
+    counts = offsets[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float64)
+    # the position of each edge is the start of its node plus its position among the edges of the node
+    first_of_node = np.repeat(np.cumsum(counts) - counts, counts)
+    edges = np.repeat(starts, counts) + np.arange(total) - first_of_node
+    return np.repeat(nodes, counts), destinations[edges], costs[edges]
+
+
+class DeltaStepping:
+    """
+    A single source shortest path engine that relax the edges in bulk with NumPy.
+
+    The nodes are grouped in buckets of width delta by their tentative distance and the buckets are processed
+    in increasing order. The light edges (cost <= delta) of the nodes of the current bucket are relaxed
+    all together, again and again until the bucket does not change, then the heavy edges of all the nodes
+    that were in the bucket are relaxed once: they can only reach the next buckets.
+    Each relaxation is a gather of the edges, an addition and a np.minimum.at scatter of the new distances.
+    The nodes whose distance decrease are added to the bucket of their new distance and the non empty buckets
+    are kept in a heap, so a search never scan all the distances to find the next bucket or its nodes.
+    The small buckets (see SMALL_BUCKET_SIZE), common on graphs with a large hop diameter like the road networks,
+    are relaxed node by node on memoryviews of the same arrays.
+
+    The distances are the same of binary_heap_dijkstra: each one is the min over the incoming edges
+    of the distance of the source plus the cost of the edge.
+    """
+
+    def __init__(self, graph: Graph, delta: Union[int, float] = None):
+        array_graph = ArrayGraph.from_graph(graph)
+        self._nodes = graph.get_nodes()
+        number_of_nodes = len(array_graph)
+        offsets = np.asarray(array_graph.get_offsets(), dtype=np.int64)
+        destinations = np.asarray(array_graph.get_destinations(), dtype=np.int64)
+        costs = np.asarray(array_graph.get_costs(), dtype=np.float64)
+        sources = np.repeat(np.arange(number_of_nodes, dtype=np.int64), np.diff(offsets))
+
+        if delta is None:
+            # the mean cost of the edges is a good bucket width for graphs with similar costs
+            delta = float(costs.mean()) if len(costs) > 0 and costs.mean() > 0 else 1.0
+        if delta <= 0:
+            raise ValueError("delta must be positive")
+        self._delta = delta
+
+        self._edges = (offsets, destinations, costs)
+        light = costs <= delta
+        self._light_edges = _to_csr(sources[light], destinations[light], costs[light], number_of_nodes)
+        self._heavy_edges = _to_csr(sources[~light], destinations[~light], costs[~light], number_of_nodes)
+        # memoryviews read an item much faster than a NumPy array, they are used for the small buckets
+        self._light_edges_views = tuple(memoryview(part) for part in self._light_edges)
+        self._heavy_edges_views = tuple(memoryview(part) for part in self._heavy_edges)
+        self._indexes = {node.get_name(): i for i, node in enumerate(self._nodes)}
+
+    def get_delta(self) -> Union[int, float]:
+        return self._delta
+
+    """
+    Relax the edges of the nodes and return the nodes whose distance has decreased
+    """
+
+    def __relax(self, nodes: np.ndarray, csr, distances: np.ndarray) -> np.ndarray:
+        edge_sources, edge_destinations, edge_costs = _gather_edges(nodes, csr)
+        new_distances = distances[edge_sources] + edge_costs
+        improving = new_distances < distances[edge_destinations]
+        edge_destinations = edge_destinations[improving]
+        np.minimum.at(distances, edge_destinations, new_distances[improving])
+        return np.unique(edge_destinations)
+
+    """
+    Find the min distance from the source to all the nodes in the graph.
+
+    :return
+        a NumPy array of distances ordered as the nodes of the graph, unreachable nodes are at positive infinity
+    """
+
+    def get_distances(self, source: Node) -> np.ndarray:
+        delta = self._delta
+        distances = np.full(len(self._nodes), positive_infinity)
+        settled = np.zeros(len(self._nodes), dtype=bool)
+        source_index = self._indexes[source.get_name()]
+        distances[source_index] = 0.0
+
+        # the nodes that have entered each bucket, a node is left in a bucket when its distance decrease further
+        # so the entries are checked when the bucket is processed
+        buckets = {0: [source_index]}
+        bucket_heap = [0]
+        while len(bucket_heap) > 0:
+            bucket = heappop(bucket_heap)
+            entries = buckets.pop(bucket)
+            if len(entries) <= SMALL_BUCKET_SIZE:
+                self.__process_small_bucket(bucket, entries, distances, settled, buckets, bucket_heap)
+                continue
+
+            frontier = np.unique(np.array(entries, dtype=np.int64))
+            frontier = frontier[~settled[frontier] & (np.floor(distances[frontier] / delta) == bucket)]
+            bucket_nodes = []
+            while len(frontier) > 0:
+                bucket_nodes.append(frontier)
+                changed = self.__relax(frontier, self._light_edges, distances)
+                changed_buckets = np.floor(distances[changed] / delta).astype(np.int64)
+                # the nodes that are still in the current bucket need to relax their light edges again
+                in_bucket = changed_buckets == bucket
+                self.__add_to_buckets(changed[~in_bucket], changed_buckets[~in_bucket], buckets, bucket_heap)
+                frontier = changed[in_bucket]
+
+            if len(bucket_nodes) == 0:
+                continue
+            bucket_nodes = np.unique(np.concatenate(bucket_nodes))
+            settled[bucket_nodes] = True
+            changed = self.__relax(bucket_nodes, self._heavy_edges, distances)
+            self.__add_to_buckets(changed, np.floor(distances[changed] / delta).astype(np.int64), buckets,
+                                  bucket_heap)
+        return distances
+
+    @staticmethod
+    def __add_to_buckets(nodes: np.ndarray, node_buckets: np.ndarray, buckets: Dict[int, List[int]],
+                         bucket_heap: List[int]):
+        if len(nodes) == 0:
+            return
+        lowest = int(node_buckets.min())
+        if lowest == node_buckets.max():
+            # the common case of the light edges: all the nodes go to the same bucket
+            groups = [(lowest, nodes)]
+        else:
+            order = np.argsort(node_buckets, kind='stable')
+            node_buckets = node_buckets[order]
+            numbers, starts = np.unique(node_buckets, return_index=True)
+            groups = zip(numbers.tolist(), np.split(nodes[order], starts[1:]))
+        for number, bucket_nodes in groups:
+            if number not in buckets:
+                buckets[number] = []
+                heappush(bucket_heap, number)
+            buckets[number].extend(bucket_nodes.tolist())
+
+    """
+    The same steps of get_distances for a single bucket, but one node and one edge at a time
+    """
+
+    def __process_small_bucket(self, bucket: int, entries: List[int], distances: np.ndarray, settled: np.ndarray,
+                               buckets: Dict[int, List[int]], bucket_heap: List[int]):
+        delta = self._delta
+        distances_view = memoryview(distances)
+        settled_view = memoryview(settled)
+        frontier = [node for node in dict.fromkeys(entries)
+                    if not settled_view[node] and floor(distances_view[node] / delta) == bucket]
+
+        bucket_nodes = {}
+        while len(frontier) > 0:
+            bucket_nodes.update(dict.fromkeys(frontier))
+            frontier = self.__relax_small(frontier, self._light_edges_views, distances_view, bucket, buckets,
+                                          bucket_heap)
+        for node in bucket_nodes:
+            settled_view[node] = True
+        self.__relax_small(list(bucket_nodes), self._heavy_edges_views, distances_view, bucket, buckets,
+                           bucket_heap)
+
+    """
+    Relax the edges of the nodes, the nodes whose distance has decreased are added to their bucket,
+    the ones that are still in the current bucket are returned instead.
+    """
+
+    def __relax_small(self, nodes: List[int], csr_views, distances_view: memoryview, bucket: int,
+                      buckets: Dict[int, List[int]], bucket_heap: List[int]) -> List[int]:
+        delta = self._delta
+        offsets, destinations, costs = csr_views
+        in_bucket = {}
+        for node in nodes:
+            distance = distances_view[node]
+            for i in range(offsets[node], offsets[node + 1]):
+                destination = destinations[i]
+                new_distance = distance + costs[i]
+                if new_distance < distances_view[destination]:
+                    distances_view[destination] = new_distance
+                    number = floor(new_distance / delta)
+                    if number == bucket:
+                        in_bucket[destination] = None
+                    elif number in buckets:
+                        buckets[number].append(destination)
+                    else:
+                        buckets[number] = [destination]
+                        heappush(bucket_heap, number)
+        return list(in_bucket)
+
+    """
+    Run the search from the source and return a DijkstraResult like binary_heap_dijkstra:
+    the nodes are sorted by distance and the predecessors form a shortest path tree.
+
+    The tree is found with a breadth first search from the source that only cross the tight edges,
+    the ones where the distance of the destination is the distance of the source plus the cost.
+    """
+
+    def run(self, source: Node) -> DijkstraResult:
+        distances = self.get_distances(source)
+        source_index = self._indexes[source.get_name()]
+        predecessors = np.full(len(self._nodes), -1, dtype=np.int64)
+        visited = np.zeros(len(self._nodes), dtype=bool)
+        visited[source_index] = True
+        frontier = np.array([source_index], dtype=np.int64)
+        while len(frontier) > 0:
+            edge_sources, edge_destinations, edge_costs = _gather_edges(frontier, self._edges)
+            tight = (distances[edge_sources] + edge_costs == distances[edge_destinations]) & \
+                    ~visited[edge_destinations]
+            frontier, first_edges = np.unique(edge_destinations[tight], return_index=True)
+            predecessors[frontier] = edge_sources[tight][first_edges]
+            visited[frontier] = True
+
+        result = []
+        for i in np.argsort(distances, kind='stable'):
+            predecessor = None if predecessors[i] == -1 else self._nodes[predecessors[i]]
+            result.append([self._nodes[i], distances[i].item(), predecessor])
+        return DijkstraResult(result)
@@ -1,5 +1,8 @@
-from typing import List, Tuple, Union, Any
+from array import array
+from heapq import heappush, heappop
+from typing import Dict, List, Tuple, Union, Any
 
+from ArrayGraph import ArrayGraph
 from DijkstraBinaryMinHeap import DijkstraBinaryMinHeap
 from Graph import Graph
 from Node import Node
@@ -16,9 +19,20 @@ positive_infinity = float('inf')
 
 
 def binary_heap_dijkstra(G: Graph, source: Node) -> 'DijkstraResult':
-    distances = [positive_infinity for i in range(0, len(G))]
-    predecessors = [None for i in range(0, len(G))]
-    dbmh = DijkstraBinaryMinHeap(G.get_nodes(), distances, predecessors)
+    # only the nodes that are reachable from the source need to go in the heap
+    reachability_index = G.get_reachability_index()
+    reachable_components = reachability_index.get_reachable_components(source)
+    reachable_nodes = []
+    unreachable_nodes = []
+    for node in G.get_nodes():
+        if reachability_index.get_component(node) in reachable_components:
+            reachable_nodes.append(node)
+        else:
+            unreachable_nodes.append(node)
+
+    distances = [positive_infinity for i in range(0, len(reachable_nodes))]
+    predecessors = [None for i in range(0, len(reachable_nodes))]
+    dbmh = DijkstraBinaryMinHeap(reachable_nodes, distances, predecessors)
 
     # set the node s distance equal to zero
     dbmh.decrease_distance(source, 0)
@@ -35,6 +49,9 @@ def binary_heap_dijkstra(G: Graph, source: Node) -> 'DijkstraResult':
             if new_path_cost < dbmh.get_distance_of_a_node(destination):
                 dbmh.decrease_distance(destination, new_path_cost)
                 dbmh.set_predecessor_of_a_node(destination, current_triplet[0])
+
+    for node in unreachable_nodes:
+        result.append([node, positive_infinity, None])
     return DijkstraResult(result)
 
 
@@ -57,7 +74,8 @@ def __find_nearest_node(distance_dictionary) -> Node:
     return nearest_node
 
 
-def __explore_node_neighbors(nearest_node: Node, distance_dictionary, predecessor_dictionary, result):
+def __explore_node_neighbors(nearest_node: Node, distance_dictionary, predecessor_dictionary, result,
+                             predecessor_edge_dictionary=None):
     for edge in nearest_node.get_edges():
         distance_new_visit = distance_dictionary[nearest_node] + edge.get_cost()
         destination = edge.get_destination()
@@ -66,6 +84,8 @@ def __explore_node_neighbors(nearest_node: Node, distance_dictionary, predecesso
             # just found a better path
             distance_dictionary[destination] = distance_new_visit
             predecessor_dictionary[destination] = nearest_node
+            if predecessor_edge_dictionary is not None:
+                predecessor_edge_dictionary[destination] = (nearest_node, edge)
 
     # store the dijkstra result of the nearest_node
     result.append(
@@ -92,6 +112,14 @@ The third element is the result of the backward Dijkstra search
 
 
 def bidirectional_dijkstra(graph: Graph, source: Node, target: Node) -> Tuple[Path, 'DijkstraResult', 'DijkstraResult']:
+    if source == target:
+        # the searches would stop before the backward one settles any node, the path is the node itself
+        return Path(source), DijkstraResult([[source, 0, None]]), DijkstraResult([[target, 0, None]])
+
+    if not graph.get_reachability_index().may_reach(source, target):
+        # no search is needed, the target is in a component that the source can not reach
+        return None, DijkstraResult([]), DijkstraResult([])
+
     # generate a reversed graph
     reversed_graph = graph.get_reversed_graph()
 
@@ -99,6 +127,8 @@ def bidirectional_dijkstra(graph: Graph, source: Node, target: Node) -> Tuple[Pa
     distance_backward_dictionary = {}
     predecessor_forward_dictionary = {}
     predecessor_backward_dictionary = {}
+    # the forward search records the edge to each predecessor, so the forward path is built without looking for edges
+    predecessor_edge_forward_dictionary = {}
 
     # initialize search
     __initialize_search(graph, distance_forward_dictionary, predecessor_forward_dictionary)
@@ -124,7 +154,7 @@ def bidirectional_dijkstra(graph: Graph, source: Node, target: Node) -> Tuple[Pa
 
             # explore
             __explore_node_neighbors(nearest_node, distance_forward_dictionary, predecessor_forward_dictionary,
-                                     forward_result)
+                                     forward_result, predecessor_edge_forward_dictionary)
 
             if nearest_node not in distance_backward_dictionary:
                 # stop criteria
@@ -152,12 +182,13 @@ def bidirectional_dijkstra(graph: Graph, source: Node, target: Node) -> Tuple[Pa
     # <- end while
 
     # continue the forward/backward search up to forward/backward_search_distance_terminator
+    # when a search has settled only one node the second to last distance is the distance of that node
     forward_search_distance_terminator = forward_result[len(forward_result) - 1][1] + \
                                          backward_result[len(backward_result) - 1][1] - \
-                                         backward_result[len(backward_result) - 2][1]
+                                         backward_result[max(len(backward_result) - 2, 0)][1]
     backward_search_distance_terminator = backward_result[len(backward_result) - 1][1] + \
                                           forward_result[len(forward_result) - 1][1] - \
-                                          forward_result[len(forward_result) - 2][1]
+                                          forward_result[max(len(forward_result) - 2, 0)][1]
 
     # --- continue forward search ---
     while len(distance_forward_dictionary) > 0:
@@ -175,7 +206,7 @@ def bidirectional_dijkstra(graph: Graph, source: Node, target: Node) -> Tuple[Pa
 
         # explore
         __explore_node_neighbors(nearest_node, distance_forward_dictionary, predecessor_forward_dictionary,
-                                 forward_result)
+                                 forward_result, predecessor_edge_forward_dictionary)
 
     # --- continue backward search ---
     while len(distance_backward_dictionary) > 0:
@@ -225,38 +256,44 @@ def bidirectional_dijkstra(graph: Graph, source: Node, target: Node) -> Tuple[Pa
             min_cost = cost
             interconnection_node = graph.get_node(node.get_name())
 
+    # the shortest path may also cross from the forward search to the backward search on an edge whose endpoints
+    # are settled by one search each, without any node settled by both: check every edge leaving the forward search
+    interconnection_edge = None
+    for node in nodes_fully_explored_in_forward_search_set:
+        forward_cost = forward_result_dictionary[node][0]
+        for edge in node.get_edges():
+            destination = edge.get_destination()
+            if destination not in backward_result_dictionary:
+                continue
+            cost = forward_cost + edge.get_cost() + backward_result_dictionary[destination][0]
+            if cost < min_cost:
+                min_cost = cost
+                interconnection_node = node
+                interconnection_edge = edge
+
     # ----- determine the path from source to target -----
 
     if interconnection_node is None:
-        return None, forward_result, backward_result
-
-    # build the backward path
-    backward_path = Path(interconnection_node)
-    if interconnection_node != target:
-        node = interconnection_node
-        while True:
-            destination_name = backward_result_dictionary[node][1].get_name()
-            destination = graph.get_node(destination_name)
-            backward_path.add_connection(destination)
-            node = destination
-            if destination == target:
-                break
-
-    # build a queue that put all the nodes in the path from the interconnection_node to the source
-    forward_path_queue = [interconnection_node]
-    if interconnection_node != source:
-        node = interconnection_node
-        while True:
-            departure_node = forward_result_dictionary[node][1]
-            forward_path_queue.append(departure_node)
-            node = departure_node
-            if departure_node == source:
-                break
-
-    # build forward path by extracting the nodes from the queue
-    forward_path = Path(forward_path_queue.pop())
-    while len(forward_path_queue) > 0:
-        forward_path.add_connection(forward_path_queue.pop())
+        return None, DijkstraResult(forward_result), DijkstraResult(backward_result)
+
+    # the backward search stores nodes of the reversed graph, map them back to the nodes of the graph
+    graph_nodes = {node: node for node in graph.get_nodes()}
+
+    # build the backward path following the backward predecessors up to the target,
+    # the edges of the reversed graph point backward so each edge is looked up in the graph with Node.get_edge
+    backward_path_start = interconnection_node if interconnection_edge is None \
+        else graph_nodes[interconnection_edge.get_destination()]
+    backward_path_nodes = [backward_path_start]
+    node = backward_path_start
+    while node != target:
+        node = graph_nodes[backward_result_dictionary[node][1]]
+        backward_path_nodes.append(node)
+    backward_path = Path.from_nodes(backward_path_nodes)
+
+    # build the forward path following the forward predecessor edges back to the source
+    forward_path = Path.from_predecessors(interconnection_node, predecessor_edge_forward_dictionary)
+    if interconnection_edge is not None:
+        forward_path.add_edge(interconnection_edge)
 
     # join the two paths
     total_path = forward_path + backward_path
@@ -264,6 +301,117 @@ def bidirectional_dijkstra(graph: Graph, source: Node, target: Node) -> Tuple[Pa
     return total_path, DijkstraResult(forward_result), DijkstraResult(backward_result)
 
 
+class DijkstraWorkspace:
+    """
+    A reusable workspace to run many Dijkstra searches on the same graph without allocating memory for each one.
+
+    The graph is converted once to an ArrayGraph and the workspace owns the distance, predecessor and heap arrays.
+    Each search has a timestamp: an entry of the arrays is valid only when its stamp is the timestamp
+    of the current search, so starting a new search never reset the arrays.
+    A node is settled when its stamp in the settled array is the timestamp of the current search:
+    only the distances and the paths of the settled nodes are final, the others may still decrease.
+    The workspace is a snapshot of the graph: a change in the edges after its creation is not seen.
+    """
+
+    def __init__(self, graph: Graph):
+        self._nodes = graph.get_nodes()
+        self._graph = ArrayGraph.from_graph(graph)
+        # the Edge objects in the same order of the edges of the ArrayGraph
+        self._edges = [edge for node in self._nodes for edge in node.get_edges()]
+        self._distances = array('d', [positive_infinity]) * len(self._graph)
+        self._predecessors = array('q', [-1]) * len(self._graph)
+        self._predecessor_edges = array('q', [-1]) * len(self._graph)
+        self._stamps = array('q', [0]) * len(self._graph)
+        self._settled = array('q', [0]) * len(self._graph)
+        self._timestamp = 0
+        self._heap = []
+
+    """
+    Run a Dijkstra search from the sources, a single node or a dictionary that gives an initial cost to each source.
+    When a target is given the search stop as soon as the target is settled.
+
+    :return
+        a DijkstraResult with the nodes settled by the search, in the order they are settled.
+        The distances and the paths of the settled nodes can be asked to the workspace up to the next search.
+    """
+
+    def run(self, sources: Union[Node, Dict[Node, Union[int, float]]], target: Node = None) -> 'DijkstraResult':
+        if isinstance(sources, Node):
+            sources = {sources: 0}
+        self._timestamp += 1
+        timestamp = self._timestamp
+        distances = self._distances
+        predecessors = self._predecessors
+        predecessor_edges = self._predecessor_edges
+        stamps = self._stamps
+        settled = self._settled
+        heap = self._heap
+        heap.clear()
+
+        for source, initial_cost in sources.items():
+            index = self._graph.get_index(source)
+            if stamps[index] != timestamp or initial_cost < distances[index]:
+                stamps[index] = timestamp
+                distances[index] = initial_cost
+                predecessors[index] = -1
+                predecessor_edges[index] = -1
+                heappush(heap, (initial_cost, index))
+
+        target_index = None if target is None else self._graph.get_index(target)
+        offsets = self._graph.get_offsets()
+        destinations = self._graph.get_destinations()
+        costs = self._graph.get_costs()
+        result = []
+        while len(heap) > 0:
+            distance, node = heappop(heap)
+            if distance > distances[node] or settled[node] == timestamp:
+                # an outdated entry, the node has already been settled with a lower distance
+                continue
+            settled[node] = timestamp
+            predecessor = predecessors[node]
+            result.append([self._nodes[node], distance, None if predecessor == -1 else self._nodes[predecessor]])
+            if node == target_index:
+                break
+            for i in range(offsets[node], offsets[node + 1]):
+                new_path_cost = distance + costs[i]
+                destination = destinations[i]
+                if stamps[destination] != timestamp or new_path_cost < distances[destination]:
+                    stamps[destination] = timestamp
+                    distances[destination] = new_path_cost
+                    predecessors[destination] = node
+                    predecessor_edges[destination] = i
+                    heappush(heap, (new_path_cost, destination))
+        heap.clear()
+        return DijkstraResult(result)
+
+    """
+    Return the distance of the node found by the last search, 
+    positive infinity if the search did not settle it (not reachable or the search stopped at the target before)
+    """
+
+    def get_distance(self, node: Node) -> Union[int, float]:
+        index = self._graph.get_index(node)
+        if self._settled[index] != self._timestamp:
+            return positive_infinity
+        return self._distances[index]
+
+    """
+    Return the path from a source of the last search to the target, 
+    None if the search did not settle the target (not reachable or the search stopped at another target before)
+    """
+
+    def get_path(self, target: Node) -> Union[Path, None]:
+        index = self._graph.get_index(target)
+        if self._settled[index] != self._timestamp:
+            return None
+        edges = []
+        while self._predecessors[index] != -1:
+            edges.append(self._edges[self._predecessor_edges[index]])
+            index = self._predecessors[index]
+        edges.reverse()
+        return Path.from_edges(self._nodes[index], edges)
+
+
 class DijkstraResult:
     """
     A class that represent in a proper way the result of a Dijkstra algorithm.
@@ -1,7 +1,9 @@
 from copy import deepcopy
-from typing import List
+from heapq import heapify, heappush, heappop
+from typing import Dict, List, Tuple, Union
 
 from Node import Node
+from Reachability import ReachabilityIndex
 
 
 class Graph:
@@ -16,6 +18,9 @@ class Graph:
         flag = len(set(name_list)) == len(nodes)
         if flag:
             self._nodes = nodes
+            # incremented when a node is removed from the graph
+            self._nodes_version = 0
+            self._reachability_index = None
         else:
             raise ValueError('All the node in a graph need to have unique names')
 
@@ -44,6 +49,27 @@ class Graph:
                 return node
         return None
 
+    """
+    Return a version that change every time an edge is added to or removed from a node of the graph,
+    or a node is removed from the graph.
+    
+    The version is made of the number of nodes removed and the sum of the edges versions of the nodes,
+    each node increments its own version (see Node.get_edges_version), so a change in another graph 
+    never changes this version. Computing it takes a look at all the nodes.
+    """
+    def get_edges_version(self) -> Tuple[int, int]:
+        return self._nodes_version, sum(node.get_edges_version() for node in self._nodes)
+
+    """
+    Return the ReachabilityIndex of the graph, it is built only when the edges of the nodes have changed
+    since the last time. The check looks at all the nodes, as the searches that use the index do anyway.
+    """
+    def get_reachability_index(self) -> ReachabilityIndex:
+        edges_version = self.get_edges_version()
+        if self._reachability_index is None or self._reachability_index.get_edges_version() != edges_version:
+            self._reachability_index = ReachabilityIndex(self._nodes, edges_version)
+        return self._reachability_index
+
     """
     Return the reversed graph
     
@@ -95,28 +121,68 @@ class Graph:
         if len(self._nodes) <= 1:
             raise RuntimeError("The graph has only one node, no shortcut to add")
         new_graph = deepcopy(self)
-        if node_to_remove is None:
-            node_to_remove = new_graph.find_a_not_important_node()
+        if node_to_remove is not None:
+            # contract the copy of the node, the edges of the original node belong to this graph
+            name = node_to_remove.get_name()
+            node_to_remove = new_graph.get_node(name)
+            if node_to_remove is None:
+                raise ValueError(f"The node {name} is not in the graph")
+        new_graph._contract_node(node_to_remove)
+        return new_graph
 
-        for node in new_graph._nodes:
-            for i in range(0, len(node.get_edges())):
-                # for all the destination of a node
+    """
+    Remove one node from this graph and add his shortcuts, the graph is modified in place. Return the removed node.
+    
+    When a shortcuts list is given every shortcut (source, destination, cost) that is proposed to a node
+    is appended to it, even the ones that the node discard since it has already a cheaper edge.
+    """
+    def _contract_node(self, node_to_remove: Node = None,
+                       shortcuts: List[Tuple[Node, Node, Union[int, float]]] = None) -> Node:
+        if node_to_remove is None:
+            node_to_remove = self.find_a_not_important_node()
 
-                if node.get_edges()[i].get_destination() == node_to_remove:
-                    # add shortcuts
-                    first_edge = node.get_edges()[i].get_cost()
+        sources = [node for node in self._nodes if node.get_edge(node_to_remove) is not None]
+        Graph.__bypass_node(node_to_remove, sources, shortcuts)
+        self._nodes.remove(node_to_remove)
+        self._nodes_version += 1
+        return node_to_remove
 
-                    for j in range(0, len(node_to_remove.get_edges())):
-                        destination = node_to_remove.get_edges()[j].get_destination()
-                        if destination != node:
-                            cost = first_edge + node_to_remove.get_edges()[j].get_cost()
-                            node.add_shortcut(destination, cost)
+    """
+    Connect each source to the destinations of node_to_remove with a shortcut 
+    and remove the edges (source -> node_to_remove). A loop on node_to_remove gives no shortcut.
+    
+    When the in-neighbours index (destination name -> source name -> source) is given it is kept up to date:
+    the new shortcuts are added and node_to_remove is removed from it.
+    """
+    @staticmethod
+    def __bypass_node(node_to_remove: Node, sources: List[Node],
+                      shortcuts: List[Tuple[Node, Node, Union[int, float]]] = None,
+                      in_neighbours: Dict[str, Dict[str, Node]] = None):
+        for node in sources:
+            if node == node_to_remove:
+                continue
+            # add shortcuts
+            first_edge = node.get_edge(node_to_remove).get_cost()
+
+            for edge in node_to_remove.get_edges():
+                destination = edge.get_destination()
+                if destination != node:
+                    cost = first_edge + edge.get_cost()
+                    if in_neighbours is not None and node.get_edge(destination) is None:
+                        in_neighbours[destination.get_name()][node.get_name()] = node
+                    node.add_shortcut(destination, cost)
+                    if shortcuts is not None:
+                        shortcuts.append((node, destination, cost))
 
             # remove the edge (node -> node_to_remove)
             node.remove_edge(node_to_remove)
 
-        new_graph._nodes.remove(node_to_remove)
-        return new_graph
+        if in_neighbours is not None:
+            in_neighbours.pop(node_to_remove.get_name(), None)
+            for edge in node_to_remove.get_edges():
+                # a loop on node_to_remove points to the entry that has just been removed
+                if edge.get_destination() != node_to_remove:
+                    in_neighbours[edge.get_destination().get_name()].pop(node_to_remove.get_name(), None)
 
     """
     return the contraction hierarchies of the graph.
@@ -125,8 +191,16 @@ class Graph:
     The next graph in the sequence has always one less node 
     but all the associated shortcuts of the removed node are still present.
     Apart from one node all the other nodes in adjacent graphs in the sequence are the same but may change some edges.
+    
+    When a number of processes is given the hierarchies are computed in parallel rounds,
+    see ParallelContraction.parallel_contraction_hierarchies: 
+    each graph in the sequence has an independent set of nodes removed instead of a single node.
     """
-    def get_contraction_hierarchies(self) -> List['Graph']:
+    def get_contraction_hierarchies(self, processes: int = None) -> List['Graph']:
+        if processes is not None:
+            # imported here since ParallelContraction depends on Graph
+            from ParallelContraction import parallel_contraction_hierarchies
+            return parallel_contraction_hierarchies(self, processes)
         graphs = []
         graph = self
         graphs.append(graph)
@@ -137,28 +211,90 @@ class Graph:
 
     """
     Return a graph with all the shortcuts that are present in all the graphs of the contraction hierarchies
+    
+    When a number of processes is given the shortcuts come from the parallel rounds, 
+    see ParallelContraction.parallel_add_shortcuts_and_get_contraction_order.
     """
-    def add_shortcuts(self) -> 'Graph':
-        new_graph = deepcopy(self)
-        contraction_graphs = new_graph.get_contraction_hierarchies()
-
-        for node in new_graph._nodes:
-            for graph in contraction_graphs:
-                contraction_node = graph.get_node(node.get_name())
-                if contraction_node is None:
-                    continue
-                for contraction_edge in contraction_node.get_edges():
-                    destination = contraction_edge.get_destination()
-                    cost = contraction_edge.get_cost()
-                    add_edge = True
-                    for edge in node.get_edges():
-                        if edge.get_destination() == destination and edge.get_cost() < cost:
-                            add_edge = False
-                    if add_edge:
-                        node.remove_edge(destination)
-                        node.add_edge(destination, cost)
-        return new_graph
+    def add_shortcuts(self, processes: int = None) -> 'Graph':
+        return self.add_shortcuts_and_get_contraction_order(processes)[0]
 
+    """
+    Return the graph of add_shortcuts and the contraction order of the nodes.
+    Each shortcut of the graph records the node that it bypasses, see Path.expand_shortcuts.
+    
+    The contraction order is the list of the names of the nodes in the order they are removed 
+    in the contraction hierarchies, the last one is the node that is never removed.
+    
+    When a number of processes is given the nodes are contracted in parallel rounds, 
+    see ParallelContraction.parallel_add_shortcuts_and_get_contraction_order.
+    """
+    def add_shortcuts_and_get_contraction_order(self, processes: int = None) -> Tuple['Graph', List[str]]:
+        if processes is not None:
+            # imported here since ParallelContraction depends on Graph
+            from ParallelContraction import parallel_add_shortcuts_and_get_contraction_order
+            return parallel_add_shortcuts_and_get_contraction_order(self, processes)
+        new_graph = self._copy()
+        nodes_dictionary = {node.get_name(): node for node in new_graph._nodes}
+
+        # contract a single working copy, every shortcut goes straight into the result
+        # where the node keeps only the cheapest edge to each destination
+        contraction_nodes = self._copy()._nodes
+        remaining_nodes = {node.get_name(): node for node in contraction_nodes}
+        positions = {node.get_name(): i for i, node in enumerate(contraction_nodes)}
+        in_neighbours = {node.get_name(): {} for node in contraction_nodes}
+        for node in contraction_nodes:
+            for edge in node.get_edges():
+                in_neighbours.setdefault(edge.get_destination().get_name(), {})[node.get_name()] = node
+
+        # the nodes by number of edges and then by last position, the first one is the node that
+        # find_a_not_important_node would return. An entry is outdated when the node has changed its number of edges.
+        heap = [(len(node.get_edges()), -positions[node.get_name()], node.get_name()) for node in contraction_nodes]
+        heapify(heap)
+
+        contraction_order = []
+        for i in range(len(contraction_nodes) - 1):
+            while True:
+                number_of_edges, position, name = heappop(heap)
+                if name in remaining_nodes and len(remaining_nodes[name].get_edges()) == number_of_edges:
+                    break
+            node_to_remove = remaining_nodes.pop(name)
+            contraction_order.append(name)
+
+            # only the in-neighbours of the node gain or lose edges
+            sources = list(in_neighbours[name].values())
+            shortcuts = []
+            Graph.__bypass_node(node_to_remove, sources, shortcuts, in_neighbours)
+            for source, destination, cost in shortcuts:
+                nodes_dictionary[source.get_name()].add_shortcut(nodes_dictionary[destination.get_name()], cost,
+                                                                 nodes_dictionary[name])
+            for source in sources:
+                if source.get_name() in remaining_nodes:
+                    heappush(heap, (len(source.get_edges()), -positions[source.get_name()], source.get_name()))
+        contraction_order.extend(node.get_name() for node in contraction_nodes if node.get_name() in remaining_nodes)
+        return new_graph, contraction_order
+
+    """
+    Return a copy of the graph with new nodes and edges, built without recursion so it works on graphs of any size.
+    """
+    def _copy(self) -> 'Graph':
+        copied_nodes = {node.get_name(): Node(node.get_name()) for node in self._nodes}
+
+        def get_copied_node(name: str) -> Node:
+            if name not in copied_nodes:
+                # a node out of the graph, copied without its edges
+                copied_nodes[name] = Node(name)
+            return copied_nodes[name]
+
+        for node in self._nodes:
+            copied_node = copied_nodes[node.get_name()]
+            for edge in node.get_edges():
+                destination = get_copied_node(edge.get_destination().get_name())
+                if edge.get_middle_node() is None:
+                    copied_node.add_edge(destination, edge.get_cost())
+                else:
+                    copied_node.add_shortcut(destination, edge.get_cost(),
+                                             get_copied_node(edge.get_middle_node().get_name()))
+        return Graph([copied_nodes[node.get_name()] for node in self._nodes])
 
 
 
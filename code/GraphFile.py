@@ -0,0 +1,73 @@
+from typing import Dict, TextIO, Union
+
+from Graph import Graph
+from Node import Node
+
+"""
+Read and write a graph as a text file.
+
+Each line of the file is an edge: the name of the source node, the name of the destination node and the cost,
+separated by white spaces. A line with a single name declare a node, useful for the nodes without edges.
+A shortcut (see Node.add_shortcut) has a fourth field, the name of the node that it bypasses,
+so a graph with the shortcuts of the contraction hierarchies can be saved and loaded without losing its paths.
+Empty lines and lines that start with # are ignored.
+The nodes are stored in the graph in the order they first appear in the file.
+"""
+
+
+def __parse_cost(text: str) -> Union[int, float]:
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def read_graph(file: TextIO) -> Graph:
+    nodes: Dict[str, Node] = {}
+
+    def get_node(name: str) -> Node:
+        node = nodes.get(name)
+        if node is None:
+            node = Node(name)
+            nodes[name] = node
+        return node
+
+    for line_number, line in enumerate(file, start=1):
+        fields = line.split()
+        if len(fields) == 0 or fields[0].startswith('#'):
+            continue
+        if len(fields) == 1:
+            get_node(fields[0])
+        elif len(fields) == 3:
+            source = get_node(fields[0])
+            source.add_edge(get_node(fields[1]), __parse_cost(fields[2]))
+        elif len(fields) == 4:
+            source = get_node(fields[0])
+            source.add_shortcut(get_node(fields[1]), __parse_cost(fields[2]), get_node(fields[3]))
+        else:
+            raise ValueError(f"line {line_number}: expected 'source destination cost', "
+                             f"'source destination cost middle' or 'node', got {line.strip()!r}")
+    return Graph(list(nodes.values()))
+
+
+def load_graph(path: str) -> Graph:
+    with open(path) as file:
+        return read_graph(file)
+
+
+def write_graph(graph: Graph, file: TextIO):
+    # declare all the nodes first, so that the order of the nodes is kept
+    for node in graph.get_nodes():
+        file.write(f"{node.get_name()}\n")
+    for node in graph.get_nodes():
+        for edge in node.get_edges():
+            if edge.get_middle_node() is None:
+                file.write(f"{node.get_name()} {edge.get_destination().get_name()} {edge.get_cost()}\n")
+            else:
+                file.write(f"{node.get_name()} {edge.get_destination().get_name()} {edge.get_cost()} "
+                           f"{edge.get_middle_node().get_name()}\n")
+
+
+def save_graph(graph: Graph, path: str):
+    with open(path, 'w') as file:
+        write_graph(graph, file)
@@ -0,0 +1,305 @@
+import json
+import mmap
+import struct
+from array import array
+from heapq import heappush, heappop
+from typing import List, Sequence, Tuple, Union
+
+from Graph import Graph
+from Node import Node
+
+positive_infinity = float('inf')
+
+"""
+The binary file of the hub labels is made of:
+    - the magic bytes and a header with the sizes of all the sections
+    - the node names encoded in JSON
+    - for the forward labels and then for the backward labels: the label offsets, the hubs and the distances
+Every section starts at a multiple of 8 bytes, so it can be read directly from a memory map.
+"""
+MAGIC = b'HUBLABEL'
+HEADER = struct.Struct('<8s7q')
+
+
+def _align(position: int) -> int:
+    return (position + 7) // 8 * 8
+
+
+"""
+Encode a sorted list of hubs as the differences between adjacent hubs, each one written in a variable number of bytes
+"""
+
+
+def _encode_hubs(hubs: Sequence[int]) -> bytes:
+    output = bytearray()
+    previous = 0
+    for hub in hubs:
+        delta = hub - previous
+        previous = hub
+        while delta >= 0x80:
+            output.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        output.append(delta)
+    return bytes(output)
+
+
+class HubLabels:
+    """
+    A hub labeling index that answer distance queries without searching the graph.
+
+    Each node has a forward label and a backward label: a list of (hub, distance) sorted by hub,
+    where the distance is from the node to the hub in the forward label and from the hub to the node
+    in the backward label. The distance from a source to a target is the min of
+    d(source, hub) + d(hub, target) over the hubs that are in both the forward label of the source
+    and the backward label of the target, so a query is a merge join of two sorted labels.
+
+    The labels of all the nodes are stored in flat arrays: the label of the node i goes from offsets[i]
+    to offsets[i + 1] (excluded) in the hubs and distances arrays.
+    When the labels are compressed the hubs are stored as variable length differences (see _encode_hubs)
+    and the hub offsets are byte positions: the labels are smaller but each query need to decode them.
+    """
+
+    def __init__(self, names: List[str], forward: Tuple[Sequence[int], Sequence[int], Sequence[int], Sequence[float]],
+                 backward: Tuple[Sequence[int], Sequence[int], Sequence[int], Sequence[float]],
+                 compressed: bool = False, buffer: mmap.mmap = None):
+        self._names = names
+        self._indexes = {name: i for i, name in enumerate(names)}
+        # each label is: (entry offsets, hub offsets, hubs, distances), hub offsets is None when not compressed
+        self._forward = forward
+        self._backward = backward
+        self._compressed = compressed
+        self._buffer = buffer
+
+    """
+    Build the hub labels from the contraction order of the graph.
+
+    The label of a node is the set of nodes settled by an upward search (a search that only goes to nodes
+    that are contracted later) in the graph with all the shortcuts.
+    The nodes are labeled from the last contracted one and each label is pruned of the hubs whose
+    upward distance is greater than the real one, that is computed with the labels already built.
+    When a number of processes is given the contraction runs in parallel rounds (see ParallelContraction),
+    it has less shortcuts so the labels are usually smaller.
+    """
+
+    @classmethod
+    def build(cls, graph: Graph, processes: int = None) -> 'HubLabels':
+        graph_with_shortcuts, contraction_order = graph.add_shortcuts_and_get_contraction_order(processes)
+        nodes = graph_with_shortcuts.get_nodes()
+        names = [node.get_name() for node in nodes]
+        indexes = {name: i for i, name in enumerate(names)}
+        rank = [0] * len(nodes)
+        for position, name in enumerate(contraction_order):
+            rank[indexes[name]] = position
+
+        # the edges that go up in the contraction order, forward and backward
+        up_forward = [[] for _ in nodes]
+        up_backward = [[] for _ in nodes]
+        for i, node in enumerate(nodes):
+            for edge in node.get_edges():
+                destination = indexes[edge.get_destination().get_name()]
+                if rank[destination] > rank[i]:
+                    up_forward[i].append((destination, edge.get_cost()))
+                elif rank[destination] < rank[i]:
+                    up_backward[destination].append((i, edge.get_cost()))
+
+        forward_labels = [None] * len(nodes)
+        backward_labels = [None] * len(nodes)
+        for node in sorted(range(len(nodes)), key=lambda n: rank[n], reverse=True):
+            forward_label = cls.__upward_search(node, up_forward)
+            backward_label = cls.__upward_search(node, up_backward)
+            # the hubs of a label have an higher rank, so their labels are final
+            forward_labels[node] = [(hub, distance) for hub, distance in forward_label
+                                    if hub == node or cls.__merge(forward_label, backward_labels[hub]) >= distance]
+            backward_labels[node] = [(hub, distance) for hub, distance in backward_label
+                                     if hub == node or cls.__merge(forward_labels[hub], backward_label) >= distance]
+        return cls(names, cls.__to_arrays(forward_labels), cls.__to_arrays(backward_labels))
+
+    """
+    Return the (hub, distance) of all the nodes reached going up in the contraction order, sorted by hub
+    """
+
+    @staticmethod
+    def __upward_search(source: int, up_edges: List[List[Tuple[int, Union[int, float]]]]) -> List[Tuple[int, float]]:
+        distances = {source: 0}
+        heap = [(0, source)]
+        while len(heap) > 0:
+            distance, node = heappop(heap)
+            if distance > distances[node]:
+                continue
+            for destination, cost in up_edges[node]:
+                new_path_cost = distance + cost
+                if new_path_cost < distances.get(destination, positive_infinity):
+                    distances[destination] = new_path_cost
+                    heappush(heap, (new_path_cost, destination))
+        return sorted(distances.items())
+
+    @staticmethod
+    def __merge(forward_label: List[Tuple[int, float]], backward_label: List[Tuple[int, float]]) -> float:
+        backward_distances = dict(backward_label)
+        min_distance = positive_infinity
+        for hub, distance in forward_label:
+            if hub in backward_distances:
+                min_distance = min(min_distance, distance + backward_distances[hub])
+        return min_distance
+
+    @staticmethod
+    def __to_arrays(labels: List[List[Tuple[int, float]]]) -> Tuple[array, None, array, array]:
+        offsets = array('q', [0])
+        hubs = array('i')
+        distances = array('d')
+        for label in labels:
+            for hub, distance in label:
+                hubs.append(hub)
+                distances.append(distance)
+            offsets.append(len(hubs))
+        return offsets, None, hubs, distances
+
+    def __len__(self):
+        return len(self._names)
+
+    """
+    Return the total number of (hub, distance) entries in the forward and backward labels
+    """
+
+    def get_number_of_entries(self) -> int:
+        return len(self._forward[3]) + len(self._backward[3])
+
+    def is_compressed(self) -> bool:
+        return self._compressed
+
+    """
+    Return the (hub, distance) pairs of the label of the node with the given index
+    """
+
+    def __get_label(self, label, node: int) -> Tuple[Sequence[int], Sequence[float]]:
+        entry_offsets, hub_offsets, hubs, distances = label
+        start = entry_offsets[node]
+        end = entry_offsets[node + 1]
+        if hub_offsets is None:
+            return hubs[start:end], distances[start:end]
+        # decode the variable length differences
+        decoded = []
+        hub = 0
+        delta = 0
+        shift = 0
+        for byte in hubs[hub_offsets[node]:hub_offsets[node + 1]]:
+            delta |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+            else:
+                hub += delta
+                decoded.append(hub)
+                delta = 0
+                shift = 0
+        return decoded, distances[start:end]
+
+    """
+    Return the min distance from the source to the target, positive infinity if the target is not reachable
+    """
+
+    def get_distance(self, source: Union[Node, str], target: Union[Node, str]) -> float:
+        source = self._indexes[source if isinstance(source, str) else source.get_name()]
+        target = self._indexes[target if isinstance(target, str) else target.get_name()]
+        forward_hubs, forward_distances = self.__get_label(self._forward, source)
+        backward_hubs, backward_distances = self.__get_label(self._backward, target)
+
+        # merge join of the two labels sorted by hub
+        min_distance = positive_infinity
+        i = 0
+        j = 0
+        while i < len(forward_hubs) and j < len(backward_hubs):
+            if forward_hubs[i] < backward_hubs[j]:
+                i += 1
+            elif forward_hubs[i] > backward_hubs[j]:
+                j += 1
+            else:
+                min_distance = min(min_distance, forward_distances[i] + backward_distances[j])
+                i += 1
+                j += 1
+        return min_distance
+
+    """
+    Write the labels in a binary file, if compressed the hubs are stored as variable length differences
+    """
+
+    def save(self, path: str, compressed: bool = None):
+        if compressed is None:
+            compressed = self._compressed
+        names = json.dumps(self._names).encode('utf-8')
+        sections = []
+        for label in (self._forward, self._backward):
+            entry_offsets = label[0]
+            all_hubs = []
+            for node in range(len(self._names)):
+                all_hubs.append(self.__get_label(label, node)[0])
+            if compressed:
+                encoded = [_encode_hubs(hubs) for hubs in all_hubs]
+                hub_offsets = array('q', [0])
+                for hubs in encoded:
+                    hub_offsets.append(hub_offsets[len(hub_offsets) - 1] + len(hubs))
+                sections.append((array('q', entry_offsets), hub_offsets, b''.join(encoded), array('d', label[3])))
+            else:
+                hubs = array('i')
+                for node_hubs in all_hubs:
+                    hubs.extend(node_hubs)
+                sections.append((array('q', entry_offsets), None, hubs, array('d', label[3])))
+
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, int(compressed), len(self._names), len(names),
+                                   len(sections[0][3]), len(sections[0][2]), len(sections[1][3]), len(sections[1][2])))
+            for data in [names] + [part for section in sections for part in section if part is not None]:
+                file.write(data if isinstance(data, bytes) else data.tobytes())
+                file.write(b'\0' * (_align(file.tell()) - file.tell()))
+
+    """
+    Open the labels written by save, the labels are memory mapped and not loaded in memory
+    """
+
+    @classmethod
+    def load(cls, path: str) -> 'HubLabels':
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, compressed, number_of_nodes, names_size, forward_entries, forward_hubs_size, \
+            backward_entries, backward_hubs_size = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            buffer.close()
+            raise ValueError(f"{path} is not an hub labels file")
+        view = memoryview(buffer)
+        position = HEADER.size
+
+        def read(size: int, typecode: str) -> memoryview:
+            nonlocal position
+            position = _align(position)
+            item_size = struct.calcsize(typecode)
+            section = view[position:position + size * item_size].cast(typecode)
+            position += size * item_size
+            return section
+
+        names = json.loads(bytes(read(names_size, 'B')).decode('utf-8'))
+        labels = []
+        for entries, hubs_size in ((forward_entries, forward_hubs_size), (backward_entries, backward_hubs_size)):
+            entry_offsets = read(number_of_nodes + 1, 'q')
+            if compressed:
+                hub_offsets = read(number_of_nodes + 1, 'q')
+                hubs = read(hubs_size, 'B')
+            else:
+                hub_offsets = None
+                hubs = read(hubs_size, 'i')
+            labels.append((entry_offsets, hub_offsets, hubs, read(entries, 'd')))
+        return cls(names, labels[0], labels[1], bool(compressed), buffer)
+
+    """
+    Release the memory mapped file opened by load, the labels can not be used after.
+    """
+
+    def close(self):
+        if self._buffer is not None:
+            # the mapping can be closed only when no view on it is alive
+            for label in (self._forward, self._backward):
+                for section in label:
+                    if isinstance(section, memoryview):
+                        section.release()
+            self._forward = None
+            self._backward = None
+            self._buffer.close()
+            self._buffer = None
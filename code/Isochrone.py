@@ -0,0 +1,167 @@
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from heapq import heappush, heappop
+from typing import Dict, List, Tuple, Union
+
+from ArrayGraph import ArrayGraph
+from Graph import Graph
+from Node import Node, Edge
+
+positive_infinity = float('inf')
+
+
+class _SparseDistances(dict):
+    """
+    The distances of a single search: only the nodes that are touched by the search are stored.
+    """
+
+    def __missing__(self, key: int) -> float:
+        return positive_infinity
+
+
+class IsochroneWorkspace:
+    """
+    The scratch buffers of a bounded search that are reused across many searches.
+
+    The distances array has an entry for each node of the graph, but after a search only the touched entries
+    are reset, so the cost of a search is proportional to the number of nodes it reaches.
+    """
+
+    def __init__(self, number_of_nodes: int):
+        self._distances = array('d', [positive_infinity]) * number_of_nodes
+        self._touched = []
+        self._heap = []
+
+    def get_distances(self) -> array:
+        return self._distances
+
+    def get_touched(self) -> List[int]:
+        return self._touched
+
+    def get_heap(self) -> List[Tuple[float, int]]:
+        return self._heap
+
+    def reset(self):
+        for node in self._touched:
+            self._distances[node] = positive_infinity
+        self._touched.clear()
+        self._heap.clear()
+
+
+class IsochroneResult:
+    """
+    The result of a bounded search: all the nodes reached within the budget, sorted by distance,
+    and the boundary edges, that start from a reached node and arrive to a node that is out of the budget.
+    """
+
+    def __init__(self, reached: List[Tuple[Node, Union[int, float]]], boundary_edges: List[Tuple[Node, Edge]]):
+        self._reached = reached
+        self._boundary_edges = boundary_edges
+
+    def get_reached(self) -> List[Tuple[Node, Union[int, float]]]:
+        return self._reached
+
+    def get_boundary_edges(self) -> List[Tuple[Node, Edge]]:
+        return self._boundary_edges
+
+    def __len__(self):
+        return len(self._reached)
+
+    def __repr__(self):
+        output = "Node | Distance\n"
+        for node, distance in self._reached:
+            output += str(node).rjust(3) + str(distance).rjust(9) + "\n"
+        output += "boundary edges: " + ", ".join(
+            "(" + str(node) + " -> " + str(edge.get_cost()) + " -> " + str(edge.get_destination()) + ")"
+            for node, edge in self._boundary_edges)
+        return output
+
+
+class Isochrone:
+    """
+    Compute the isochrones of a graph: everything that can be reached from one or more sources within a cost budget.
+
+    The graph is converted once to an ArrayGraph, then each search is a Dijkstra search that stops
+    at the budget. The heap is populated lazily (a node enters the heap only when it is reached)
+    and the distances are stored only for the touched nodes, so a search never visits the whole graph.
+    """
+
+    def __init__(self, graph: Graph):
+        self._nodes = graph.get_nodes()
+        self._graph = ArrayGraph.from_graph(graph)
+        # the Edge objects in the same order of the edges of the ArrayGraph
+        self._edges = [edge for node in self._nodes for edge in node.get_edges()]
+        self._thread_local = threading.local()
+
+    """
+    Return the nodes reachable within the budget from the sources.
+
+    sources can be a single node, a list of nodes or a dictionary that gives an initial cost to each source.
+    """
+
+    def search(self, sources: Union[Node, List[Node], Dict[Node, Union[int, float]]],
+               budget: Union[int, float]) -> IsochroneResult:
+        return self.__search(sources, budget, _SparseDistances(), [], [])
+
+    """
+    Return the isochrone of each origin, the searches run on a pool of threads
+    and each thread reuse its own IsochroneWorkspace across all its searches.
+    """
+
+    def search_batch(self, origins: List[Union[Node, List[Node], Dict[Node, Union[int, float]]]],
+                     budget: Union[int, float], threads: int = None) -> List[IsochroneResult]:
+        with ThreadPoolExecutor(threads) as executor:
+            return list(executor.map(lambda origin: self.__search_with_workspace(origin, budget), origins))
+
+    def __search_with_workspace(self, sources, budget: Union[int, float]) -> IsochroneResult:
+        workspace = getattr(self._thread_local, 'workspace', None)
+        if workspace is None:
+            workspace = IsochroneWorkspace(len(self._graph))
+            self._thread_local.workspace = workspace
+        try:
+            return self.__search(sources, budget, workspace.get_distances(), workspace.get_touched(),
+                                 workspace.get_heap())
+        finally:
+            workspace.reset()
+
+    def __search(self, sources, budget: Union[int, float], distances, touched: List[int],
+                 heap: List[Tuple[float, int]]) -> IsochroneResult:
+        if isinstance(sources, Node):
+            sources = {sources: 0}
+        elif not isinstance(sources, dict):
+            sources = {source: 0 for source in sources}
+
+        for source, initial_cost in sources.items():
+            index = self._graph.get_index(source)
+            if initial_cost <= budget and initial_cost < distances[index]:
+                if distances[index] == positive_infinity:
+                    touched.append(index)
+                distances[index] = initial_cost
+                heappush(heap, (initial_cost, index))
+
+        offsets = self._graph.get_offsets()
+        destinations = self._graph.get_destinations()
+        costs = self._graph.get_costs()
+        reached = []
+        while len(heap) > 0:
+            distance, node = heappop(heap)
+            if distance > distances[node]:
+                continue
+            reached.append((node, distance))
+            for i in range(offsets[node], offsets[node + 1]):
+                new_path_cost = distance + costs[i]
+                destination = destinations[i]
+                if new_path_cost <= budget and new_path_cost < distances[destination]:
+                    if distances[destination] == positive_infinity:
+                        touched.append(destination)
+                    distances[destination] = new_path_cost
+                    heappush(heap, (new_path_cost, destination))
+
+        # every node with a finite distance has been reached, so the boundary edges are the ones to infinity
+        boundary_edges = []
+        for node, distance in reached:
+            for i in range(offsets[node], offsets[node + 1]):
+                if distances[destinations[i]] == positive_infinity:
+                    boundary_edges.append((self._nodes[node], self._edges[i]))
+        return IsochroneResult([(self._nodes[node], distance) for node, distance in reached], boundary_edges)
@@ -8,20 +8,52 @@ class Node(object):
     Each node have a:
         - name: an identifier
         - edges: a list of connection that stars from this node and arrive to another node
+
+    Internally the edges are indexed by the name of their destination, in insertion order,
+    so finding, updating or removing the edge to a destination do not need to scan all the edges.
+    A node has at most one edge to each destination: adding a second one keeps only the cheapest.
+
+    Every time an edge is added or removed the node increments its edges version, the graphs sum the versions
+    of their nodes (see Graph.get_edges_version) so that the indexes built on the shape of a graph
+    (see Reachability) can tell if they are outdated.
     """
 
     def __init__(self, name: str):
         self._name = name
-        self._edges = list()
+        self._edges = dict()
+        # the list returned by get_edges, rebuilt only after an edge has been removed
+        self._edges_list = list()
+        self._edges_version = 0
 
     def get_name(self) -> str:
         return self._name
 
+    def get_edges_version(self) -> int:
+        return self._edges_version
+
     def get_edges(self) -> List['Edge']:
-        return self._edges
+        if self._edges_list is None:
+            self._edges_list = list(self._edges.values())
+        return self._edges_list
 
     def add_edge(self, destination_node: 'Node', cost: Union[int, float]):
-        self._edges.append(Edge(destination_node, cost))
+        edge = self._edges.get(destination_node.get_name())
+        if edge is None:
+            edge = Edge(destination_node, cost)
+            self._edges[destination_node.get_name()] = edge
+            self._edges_version += 1
+            if self._edges_list is not None:
+                self._edges_list.append(edge)
+        elif cost < edge.get_cost():
+            edge.set_cost(cost)
+            edge.set_middle_node(None)
+
+    """
+    Return the edge that goes from this node to the destination_node, None if the two nodes are not connected.
+    """
+
+    def get_edge(self, destination_node: 'Node') -> Union['Edge', None]:
+        return self._edges.get(destination_node.get_name())
 
     def __eq__(self, o: object) -> bool:
         return self._name.__eq__(o.get_name())
@@ -32,27 +64,23 @@ class Node(object):
     """
     Check if it is really necessary to add a shortcut.
     In case the node has already a equivalent cheaper edge do not add this false shortcut.
+
+    The middle_node is the node that the shortcut bypasses: the shortcut is the edge (self -> middle_node)
+    followed by the edge (middle_node -> destination_node), see Path.expand_shortcuts.
     """
 
-    def add_shortcut(self, destination_node: 'Node', cost: Union[int, float]):
-        need_to_add_shortcut = True
-        for edge in self._edges:
-            if edge.get_destination() == destination_node and edge.get_cost() <= cost:
-                # I discover a path that is longer than one that I previously have.
-                # So I do not need to add this false shortcut
-                need_to_add_shortcut = False
-            if edge.get_destination() == destination_node and edge.get_cost() > cost:
-                # need to update the cost, a better way has just been discover
-                need_to_add_shortcut = False
-                edge.set_cost(cost)
-        if need_to_add_shortcut:
+    def add_shortcut(self, destination_node: 'Node', cost: Union[int, float], middle_node: 'Node' = None):
+        # add_edge keeps the cheapest edge, so a false shortcut is never added
+        # and a better way that has just been discovered update the cost and the bypassed node
+        edge = self._edges.get(destination_node.get_name())
+        if edge is None or cost < edge.get_cost():
             self.add_edge(destination_node, cost)
+            self._edges[destination_node.get_name()].set_middle_node(middle_node)
 
     def remove_edge(self, destination_node: 'Node'):
-        for edge in self._edges:
-            if edge.get_destination() == destination_node:
-                self._edges.remove(edge)
-                break
+        if self._edges.pop(destination_node.get_name(), None) is not None:
+            self._edges_list = None
+            self._edges_version += 1
 
     def __repr__(self):
         return self.get_name()
@@ -66,6 +94,7 @@ class Edge:
     Each edge have a:
         - destination: a node that the edge arrive
         - cost: the cost to cross that edge
+        - middle node: the node that the edge bypasses when it is a shortcut, None for an edge of the graph
     """
 
     def __init__(self, destination: Node, cost: Union[int, float]):
@@ -73,6 +102,7 @@ class Edge:
             raise ValueError("a cost to cross an edge can not be negative")
         self._destination = destination
         self._cost = cost
+        self._middle_node = None
 
     def __repr__(self):
         return "Edge={destination: " + self._destination.get_name() + \
@@ -86,3 +116,10 @@ class Edge:
 
     def set_cost(self, new_cost: Union[int, float]):
         self._cost = new_cost
+
+    def get_middle_node(self) -> Union[Node, None]:
+        return self._middle_node
+
+    def set_middle_node(self, middle_node: Union[Node, None]):
+        self._middle_node = middle_node
+
@@ -0,0 +1,257 @@
+import os
+from heapq import heappush, heappop
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from typing import Dict, Iterator, List, Set, Tuple, Union
+
+from Graph import Graph
+from Node import Node
+
+"""
+Build the contraction hierarchies of a graph contracting many nodes at the same time.
+
+In each round an independent set of nodes is selected: a node is selected when its priority is lower
+than the priority of all its neighbours, so no two selected nodes are adjacent.
+The shortcuts of the selected nodes are computed concurrently on a set of worker processes,
+each worker run the witness searches of a node on the graph of the round without the selected nodes.
+Then all the selected nodes are removed and their shortcuts are merged in the graph keeping the cheapest edge.
+The rounds give both the contraction hierarchies (parallel_contraction_hierarchies) and, as Graph.add_shortcuts,
+the graph with all the shortcuts and the contraction order (parallel_add_shortcuts_and_get_contraction_order).
+
+The workers are started once and receive the whole adjacency only at the start. Each worker keeps its own copy
+of the adjacency up to date: in every round it receives the changes of the previous round (the removed nodes
+and the shortcuts that have been merged), the nodes contracted in the round and its share of the selected nodes.
+"""
+
+# the adjacency of the round and the nodes that are contracted in the round, owned by a worker process
+_worker_out_edges = None
+_worker_contracted = None
+
+# a round as it is sent to a worker:
+# the removed nodes with their in-neighbours, the merged shortcuts (source, destination, cost, bypassed node),
+# the contracted nodes and the tasks of the worker
+Round = Tuple[List[Tuple[int, List[int]]], List[Tuple[int, int, Union[int, float], int]], Set[int],
+              List[Tuple[int, Dict[int, Union[int, float]]]]]
+
+
+"""
+Return the min distance from source to all the nodes with a distance not greater than max_cost,
+the search never cross a node that is contracted in the round.
+"""
+
+
+def _witness_search(source: int, max_cost: Union[int, float]) -> Dict[int, Union[int, float]]:
+    distances = {source: 0}
+    heap = [(0, source)]
+    while len(heap) > 0:
+        distance, node = heappop(heap)
+        if distance > distances[node]:
+            continue
+        for destination, cost in _worker_out_edges[node].items():
+            new_path_cost = distance + cost
+            if new_path_cost <= max_cost and destination not in _worker_contracted and \
+                    new_path_cost < distances.get(destination, float('inf')):
+                distances[destination] = new_path_cost
+                heappush(heap, (new_path_cost, destination))
+    return distances
+
+
+"""
+Return the shortcuts (source, destination, cost) that are needed when the node is removed.
+
+A shortcut source -> destination is needed only if there is no witness:
+a path that does not cross the node and is not more expensive than source -> node -> destination.
+"""
+
+
+def _find_shortcuts(task: Tuple[int, Dict[int, Union[int, float]]]) -> List[Tuple[int, int, Union[int, float]]]:
+    node, in_edges = task
+    out_edges = _worker_out_edges[node]
+    shortcuts = []
+    if len(out_edges) == 0:
+        return shortcuts
+    max_out_cost = max(out_edges.values())
+    for source, in_cost in in_edges.items():
+        witness_distances = _witness_search(source, in_cost + max_out_cost)
+        for destination, out_cost in out_edges.items():
+            if destination == source:
+                continue
+            cost = in_cost + out_cost
+            if witness_distances.get(destination, float('inf')) > cost:
+                shortcuts.append((source, destination, cost))
+    return shortcuts
+
+
+"""
+The loop of a worker process: apply the changes of each round to the adjacency and send back the shortcuts
+of the tasks, up to a None message.
+"""
+
+
+def _run_worker(connection: Connection, out_edges: Dict[int, Dict[int, Union[int, float]]]):
+    global _worker_out_edges, _worker_contracted
+    _worker_out_edges = out_edges
+    while True:
+        message: Round = connection.recv()
+        if message is None:
+            break
+        removed, merged_shortcuts, contracted, tasks = message
+        for node, sources in removed:
+            _worker_out_edges.pop(node)
+            for source in sources:
+                _worker_out_edges[source].pop(node, None)
+        for source, destination, cost, middle in merged_shortcuts:
+            _worker_out_edges[source][destination] = cost
+        _worker_contracted = contracted
+        connection.send([_find_shortcuts(task) for task in tasks])
+    connection.close()
+
+
+def __get_priority(node: int, out_edges, in_edges) -> Tuple[int, int]:
+    # the edge difference: how many edges the graph gain in the worst case when the node is removed
+    in_degree = len(in_edges[node])
+    out_degree = len(out_edges[node])
+    return in_degree * out_degree - in_degree - out_degree, node
+
+
+def __select_independent_set(remaining: Set[int], out_edges, in_edges) -> List[int]:
+    priorities = {node: __get_priority(node, out_edges, in_edges) for node in remaining}
+    independent_set = []
+    for node in sorted(remaining):
+        priority = priorities[node]
+        if all(priority < priorities[neighbour] for neighbour in out_edges[node]) and \
+                all(priority < priorities[neighbour] for neighbour in in_edges[node]):
+            independent_set.append(node)
+    if len(independent_set) == len(remaining):
+        # the last node is never contracted, as in Graph.get_contraction_hierarchies
+        independent_set.remove(max(independent_set, key=lambda n: priorities[n]))
+    return independent_set
+
+
+def __build_graph(names: List[str], remaining: Set[int], out_edges) -> Graph:
+    nodes = {index: Node(names[index]) for index in sorted(remaining)}
+    for index, node in nodes.items():
+        for destination, cost in out_edges[index].items():
+            node.add_edge(nodes[destination], cost)
+    return Graph(list(nodes.values()))
+
+
+"""
+Contract the graph in parallel rounds. After each round yield the independent set that has been contracted,
+the shortcuts (source, destination, cost, bypassed node) that have been merged, the remaining nodes
+and their adjacency, all as node indexes of the graph.
+"""
+
+
+def __contract_in_rounds(graph: Graph, processes: int = None) \
+        -> Iterator[Tuple[List[int], List[Tuple[int, int, Union[int, float], int]], Set[int], Dict]]:
+    processes = processes or os.cpu_count() or 1
+    graph_nodes = graph.get_nodes()
+    indexes = {node.get_name(): i for i, node in enumerate(graph_nodes)}
+
+    # keep only the cheapest edge between two nodes, loops do not change any shortest path
+    out_edges = {i: {} for i in range(len(graph_nodes))}
+    in_edges = {i: {} for i in range(len(graph_nodes))}
+    for i, node in enumerate(graph_nodes):
+        for edge in node.get_edges():
+            destination = indexes[edge.get_destination().get_name()]
+            cost = edge.get_cost()
+            if destination != i and cost < out_edges[i].get(destination, float('inf')):
+                out_edges[i][destination] = cost
+                in_edges[destination][i] = cost
+
+    remaining = set(range(len(graph_nodes)))
+    if len(remaining) <= 1:
+        return
+
+    workers = []
+    try:
+        for _ in range(processes):
+            connection, worker_connection = Pipe()
+            worker = Process(target=_run_worker, args=(worker_connection, out_edges), daemon=True)
+            worker.start()
+            worker_connection.close()
+            workers.append((worker, connection))
+
+        # the changes of the last round that the workers have not seen yet
+        removed = []
+        merged_shortcuts = []
+        while len(remaining) > 1:
+            independent_set = __select_independent_set(remaining, out_edges, in_edges)
+            contracted = set(independent_set)
+
+            tasks = [(node, in_edges[node]) for node in independent_set]
+            for i, (worker, connection) in enumerate(workers):
+                connection.send((removed, merged_shortcuts, contracted, tasks[i::len(workers)]))
+            all_shortcuts = [connection.recv() for worker, connection in workers]
+
+            # merge step: remove the contracted nodes and then add their shortcuts
+            removed = []
+            merged_shortcuts = []
+            for node in independent_set:
+                removed.append((node, list(in_edges[node])))
+                for destination in out_edges.pop(node):
+                    in_edges[destination].pop(node)
+                for source in in_edges.pop(node):
+                    out_edges[source].pop(node)
+                remaining.remove(node)
+            for i, worker_shortcuts in enumerate(all_shortcuts):
+                # the shortcuts of a worker are in the order of its tasks
+                for (middle, sources), shortcuts in zip(tasks[i::len(workers)], worker_shortcuts):
+                    for source, destination, cost in shortcuts:
+                        if cost < out_edges[source].get(destination, float('inf')):
+                            out_edges[source][destination] = cost
+                            in_edges[destination][source] = cost
+                            merged_shortcuts.append((source, destination, cost, middle))
+
+            yield independent_set, merged_shortcuts, remaining, out_edges
+    finally:
+        for worker, connection in workers:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for worker, connection in workers:
+            worker.join()
+
+
+"""
+Return the contraction hierarchies of the graph computed in parallel rounds.
+
+As in Graph.get_contraction_hierarchies the first graph is the graph itself and the last graph has only one node,
+but each graph in the sequence has all the nodes of an independent set removed instead of a single node.
+"""
+
+
+def parallel_contraction_hierarchies(graph: Graph, processes: int = None) -> List[Graph]:
+    names = [node.get_name() for node in graph.get_nodes()]
+    graphs = [graph]
+    for independent_set, merged_shortcuts, remaining, out_edges in __contract_in_rounds(graph, processes):
+        graphs.append(__build_graph(names, remaining, out_edges))
+    return graphs
+
+
+"""
+Return, as Graph.add_shortcuts_and_get_contraction_order, the graph with all the shortcuts
+and the contraction order, computed in parallel rounds.
+
+The nodes of a round are in the contraction order one after the other: they are not adjacent,
+so their relative order does not matter. Only the shortcuts that have no witness are added,
+so the graph has usually much less shortcuts than the one of Graph.add_shortcuts.
+As there, each shortcut records the node that it bypasses.
+"""
+
+
+def parallel_add_shortcuts_and_get_contraction_order(graph: Graph, processes: int = None) \
+        -> Tuple[Graph, List[str]]:
+    new_graph = graph._copy()
+    nodes = new_graph.get_nodes()
+    contraction_order = []
+    for independent_set, merged_shortcuts, remaining, out_edges in __contract_in_rounds(graph, processes):
+        contraction_order.extend(nodes[node].get_name() for node in independent_set)
+        for source, destination, cost, middle in merged_shortcuts:
+            nodes[source].add_shortcut(nodes[destination], cost, nodes[middle])
+    contracted = set(contraction_order)
+    contraction_order.extend(node.get_name() for node in nodes if node.get_name() not in contracted)
+    return new_graph, contraction_order
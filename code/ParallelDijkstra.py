@@ -0,0 +1,222 @@
+import mmap
+import os
+from array import array
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator, List, Tuple, Union
+
+from ArrayGraph import ArrayGraph
+from Graph import Graph
+from Node import Node
+
+"""
+Compute the shortest distances from many sources at the same time on a pool of processes.
+
+The graph is converted once to an ArrayGraph and its arrays are copied in shared memory blocks,
+so that the workers read the same graph without copying it. Each worker receive a block of source indexes
+and run a Dijkstra search for each one of them.
+The distances are streamed back to the caller a block at a time or written directly by the workers
+in a memory mapped matrix file.
+"""
+
+# the graph attached by a worker process and, if any, the output matrix where it writes the distances
+_worker_graph = None
+_worker_shared_memories = []
+_worker_output = None
+
+
+class SharedArrayGraph:
+    """
+    An ArrayGraph copied in shared memory blocks.
+
+    The descriptor is a small tuple that can be sent to other processes to attach the same graph.
+    The blocks are released and unlinked by close(), the workers only attach them.
+    """
+
+    def __init__(self, graph: ArrayGraph):
+        self._shared_memories = []
+        for sequence, typecode in ((graph.get_offsets(), 'q'), (graph.get_destinations(), 'q'),
+                                   (graph.get_costs(), 'd')):
+            data = array(typecode, sequence)
+            shared_memory = SharedMemory(create=True, size=max(1, len(data) * data.itemsize))
+            shared_memory.buf[:len(data) * data.itemsize] = data.tobytes()
+            self._shared_memories.append(shared_memory)
+        self._descriptor = (len(graph), graph.get_number_of_edges(),
+                            tuple(shared_memory.name for shared_memory in self._shared_memories))
+
+    def get_descriptor(self) -> Tuple[int, int, Tuple[str, str, str]]:
+        return self._descriptor
+
+    """
+    Attach the graph described by a descriptor, return the graph and the shared memory blocks to keep alive.
+    """
+
+    @staticmethod
+    def attach(descriptor: Tuple[int, int, Tuple[str, str, str]]) -> Tuple[ArrayGraph, List[SharedMemory]]:
+        number_of_nodes, number_of_edges, names = descriptor
+        shared_memories = [SharedMemory(name=name) for name in names]
+        offsets = shared_memories[0].buf.cast('q')[:number_of_nodes + 1]
+        destinations = shared_memories[1].buf.cast('q')[:number_of_edges]
+        costs = shared_memories[2].buf.cast('d')[:number_of_edges]
+        return ArrayGraph(None, offsets, destinations, costs), shared_memories
+
+    def close(self):
+        for shared_memory in self._shared_memories:
+            shared_memory.close()
+            shared_memory.unlink()
+        self._shared_memories = []
+
+    def __enter__(self) -> 'SharedArrayGraph':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class DistanceMatrix:
+    """
+    A matrix of distances, one row for each source and one column for each node of the graph.
+
+    The distances are stored as 8 bytes floats in row major order, either in memory or in a memory mapped file.
+    """
+
+    def __init__(self, source_names: List[str], target_names: List[str], buffer: Union[bytearray, mmap.mmap]):
+        if len(buffer) != len(source_names) * len(target_names) * 8:
+            raise ValueError('the buffer size does not match the matrix size')
+        self._source_indexes = {name: i for i, name in enumerate(source_names)}
+        self._target_indexes = {name: i for i, name in enumerate(target_names)}
+        self._buffer = buffer
+        self._view = memoryview(buffer).cast('d') if len(buffer) > 0 else []
+
+    """
+    Open a matrix file written by all_pairs or multi_source_matrix
+    """
+
+    @classmethod
+    def open(cls, path: str, source_names: List[str], target_names: List[str]) -> 'DistanceMatrix':
+        with open(path, 'r+b') as file:
+            buffer = mmap.mmap(file.fileno(), 0) if os.path.getsize(path) > 0 else bytearray()
+        return cls(source_names, target_names, buffer)
+
+    def get_distance(self, source: Node, target: Node) -> float:
+        row = self._source_indexes[source.get_name()]
+        return self._view[row * len(self._target_indexes) + self._target_indexes[target.get_name()]]
+
+    """
+    Return the distances from the source to all the nodes, ordered as the nodes of the graph
+    """
+
+    def get_row(self, source: Node) -> memoryview:
+        row = self._source_indexes[source.get_name()]
+        return self._view[row * len(self._target_indexes):(row + 1) * len(self._target_indexes)]
+
+    def close(self):
+        if isinstance(self._view, memoryview):
+            self._view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+
+def _initialize_worker(descriptor: Tuple[int, int, Tuple[str, str, str]], output_path: Union[str, None]):
+    global _worker_graph, _worker_shared_memories, _worker_output
+    _worker_graph, _worker_shared_memories = SharedArrayGraph.attach(descriptor)
+    if output_path is not None:
+        with open(output_path, 'r+b') as file:
+            _worker_output = mmap.mmap(file.fileno(), 0)
+
+
+def _run_block(block: Tuple[int, List[int]]) -> Tuple[int, List[array]]:
+    first_row, sources = block
+    return first_row, [_worker_graph.get_distances(source) for source in sources]
+
+
+def _write_block(block: Tuple[int, List[int]]) -> Tuple[int, int]:
+    first_row, sources = block
+    row_size = len(_worker_graph) * 8
+    for i, source in enumerate(sources):
+        start = (first_row + i) * row_size
+        _worker_output[start:start + row_size] = _worker_graph.get_distances(source).tobytes()
+    return first_row, len(sources)
+
+
+def __split_in_blocks(sources: List[int], processes: int, chunk_size: Union[int, None]) -> List[Tuple[int, List[int]]]:
+    if chunk_size is None:
+        # a few blocks for each process, so that a slow block does not leave the other processes idle
+        chunk_size = max(1, len(sources) // (processes * 4))
+    return [(i, sources[i:i + chunk_size]) for i in range(0, len(sources), chunk_size)]
+
+
+"""
+Find the min distance from each source to all the nodes in the graph, running the searches on a pool of processes.
+
+The results are yielded as soon as a block of sources is completed, so the blocks may arrive in any order.
+
+:return
+    an iterator of (sources, rows), where rows[i] is an array with the distances from sources[i]
+    to all the nodes ordered as graph.get_nodes(). Unreachable nodes are at positive infinity.
+"""
+
+
+def multi_source(graph: Graph, sources: List[Node], processes: int = None,
+                 chunk_size: int = None) -> Iterator[Tuple[List[Node], List[array]]]:
+    for first_row, rows in __run_blocks(graph, sources, processes, chunk_size):
+        yield sources[first_row:first_row + len(rows)], rows
+
+
+def __run_blocks(graph: Graph, sources: List[Node], processes: Union[int, None],
+                 chunk_size: Union[int, None]) -> Iterator[Tuple[int, List[array]]]:
+    array_graph = ArrayGraph.from_graph(graph)
+    processes = processes or os.cpu_count() or 1
+    blocks = __split_in_blocks([array_graph.get_index(source) for source in sources], processes, chunk_size)
+    if len(blocks) == 0:
+        return
+    with SharedArrayGraph(array_graph) as shared_graph:
+        with Pool(processes, initializer=_initialize_worker,
+                  initargs=(shared_graph.get_descriptor(), None)) as pool:
+            for first_row, rows in pool.imap_unordered(_run_block, blocks):
+                yield first_row, rows
+
+
+"""
+Find the min distance from each source to all the nodes in the graph and store them in a DistanceMatrix.
+
+When an output_path is given the workers write the rows directly in a memory mapped file at that path,
+otherwise the matrix is kept in memory.
+"""
+
+
+def multi_source_matrix(graph: Graph, sources: List[Node], processes: int = None, chunk_size: int = None,
+                        output_path: str = None) -> DistanceMatrix:
+    source_names = [source.get_name() for source in sources]
+    target_names = [node.get_name() for node in graph.get_nodes()]
+    row_size = len(target_names) * 8
+
+    if output_path is None:
+        buffer = bytearray(len(sources) * row_size)
+        for first_row, rows in __run_blocks(graph, sources, processes, chunk_size):
+            for i, row in enumerate(rows):
+                start = (first_row + i) * row_size
+                buffer[start:start + row_size] = row.tobytes()
+        return DistanceMatrix(source_names, target_names, buffer)
+
+    with open(output_path, 'wb') as file:
+        file.truncate(len(sources) * row_size)
+    array_graph = ArrayGraph.from_graph(graph)
+    processes = processes or os.cpu_count() or 1
+    blocks = __split_in_blocks([array_graph.get_index(source) for source in sources], processes, chunk_size)
+    if len(blocks) > 0:
+        with SharedArrayGraph(array_graph) as shared_graph:
+            with Pool(processes, initializer=_initialize_worker,
+                      initargs=(shared_graph.get_descriptor(), output_path)) as pool:
+                for _ in pool.imap_unordered(_write_block, blocks):
+                    pass
+    return DistanceMatrix.open(output_path, source_names, target_names)
+
+
+"""
+Find the min distance between all the pairs of nodes in the graph, see multi_source_matrix
+"""
+
+
+def all_pairs(graph: Graph, processes: int = None, chunk_size: int = None, output_path: str = None) -> DistanceMatrix:
+    return multi_source_matrix(graph, graph.get_nodes(), processes, chunk_size, output_path)
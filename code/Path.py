@@ -1,4 +1,6 @@
-from Node import Node
+from typing import List, Mapping, Tuple, Union
+
+from Node import Node, Edge
 
 
 class Path(object):
@@ -20,17 +22,114 @@ class Path(object):
         self._edges = []
         self._total_cost = 0
 
+    """
+    Build a path that cross all the nodes in the given order.
+
+    The edge between two consecutive nodes is found with Node.get_edge, prefer from_edges
+    or from_predecessors when the search has already recorded the edges.
+
+    :raise
+        a RuntimeError when two consecutive nodes are not connected
+    """
+
+    @classmethod
+    def from_nodes(cls, nodes: List[Node]) -> 'Path':
+        if len(nodes) == 0:
+            raise ValueError("a path need at least one node")
+        path = cls(nodes[0])
+        for i in range(1, len(nodes)):
+            path.add_connection(nodes[i])
+        return path
+
+    """
+    Build the path that starts from the source and cross the edges in the given order.
+    """
+
+    @classmethod
+    def from_edges(cls, source: Node, edges: List[Edge]) -> 'Path':
+        path = cls(source)
+        for edge in edges:
+            path.add_edge(edge)
+        return path
+
+    """
+    Build the path from the first node of a predecessor chain to the target.
+
+    The chain is followed backward from the target: predecessor_edges[node] is the node that come before node
+    in the path and the edge from that node to node, the chain stop at the first node that has no predecessor
+    (None or missing). The edges are taken as they are, so the cost is proportional to the length of the path.
+    """
+
+    @classmethod
+    def from_predecessors(cls, target: Node,
+                          predecessor_edges: Mapping[Node, Union[Tuple[Node, Edge], None]]) -> 'Path':
+        edges = []
+        node = target
+        predecessor_edge = predecessor_edges.get(target)
+        while predecessor_edge is not None:
+            node, edge = predecessor_edge
+            edges.append(edge)
+            predecessor_edge = predecessor_edges.get(node)
+        edges.reverse()
+        return cls.from_edges(node, edges)
+
+    """
+    Return the path with each shortcut replaced by the edges of the graph that it bypasses, see Node.add_shortcut.
+
+    A shortcut is expanded in the edge to its middle node and the edge from its middle node, that can be shortcuts
+    too, so the path is expanded with a stack and not with recursion. The cost is the same of this path,
+    apart from the rounding of float costs, and the nodes are the ones of the graph with the shortcuts.
+    """
+
+    def expand_shortcuts(self) -> 'Path':
+        path = Path(self._source)
+        for source, edge in zip(self._nodes, self._edges):
+            stack = [(source, edge)]
+            while len(stack) > 0:
+                source, edge = stack.pop()
+                middle_node = edge.get_middle_node()
+                if middle_node is None:
+                    path.add_edge(edge)
+                else:
+                    # the second half is pushed first so that the first half is expanded first
+                    stack.append((middle_node, middle_node.get_edge(edge.get_destination())))
+                    stack.append((source, source.get_edge(middle_node)))
+        return path
+
+    def get_source(self) -> Node:
+        return self._source
+
+    def get_target(self) -> Node:
+        return self._target
+
+    def get_nodes(self) -> List[Node]:
+        return self._nodes
+
+    def get_edges(self) -> List[Edge]:
+        return self._edges
+
+    def get_total_cost(self) -> Union[int, float]:
+        return self._total_cost
+
+    """
+    Append an edge that starts from the target of the path. The destination of the edge become the new target.
+
+    The edge is trusted to leave the current target, no scan of the edges of the target is done.
+    """
+
+    def add_edge(self, edge: Edge):
+        self._edges.append(edge)
+        self._total_cost += edge.get_cost()
+        self._target = edge.get_destination()
+        self._nodes.append(self._target)
+
     def add_connection(self, next_node: Node):
-        nodes_disconnected = True
-        for edge in self._target.get_edges():
-            if edge.get_destination() == next_node:
-                self._edges.append(edge)
-                self._total_cost += edge.get_cost()
-                nodes_disconnected = False
-                break
-        if nodes_disconnected:
+        edge = self._target.get_edge(next_node)
+        if edge is None:
             raise RuntimeError(
                 f"Can not add {next_node} to the path sine is not connected to {self._nodes[len(self._nodes) - 1]}")
+        self._edges.append(edge)
+        self._total_cost += edge.get_cost()
         self._target = next_node
         self._nodes.append(next_node)
 
@@ -44,8 +143,38 @@ class Path(object):
         output += ") total cost: " + str(self._total_cost)
         return output
 
-    def __add__(self, other):
-        for node in other._nodes:
-            if node is not other._source:
-                self.add_connection(node)
+    """
+    Check that other starts where this path ends, the two paths can then be joined without looking at any edge.
+    """
+
+    def __check_joinable(self, other: 'Path'):
+        if other._source != self._target:
+            raise RuntimeError(f"Can not join a path that ends in {self._target} "
+                               f"with a path that starts from {other._source}")
+
+    """
+    Return a new path that is this path followed by other. Both the operands are left unchanged,
+    so the nodes and the edges of both are copied: the cost is proportional to the length of the new path.
+    Use += to append to a path in place.
+    """
+
+    def __add__(self, other: 'Path') -> 'Path':
+        self.__check_joinable(other)
+        path = Path(self._source)
+        path._nodes = self._nodes + other._nodes[1:]
+        path._edges = self._edges + other._edges
+        path._target = other._target
+        path._total_cost = self._total_cost + other._total_cost
+        return path
+
+    """
+    Append other at the end of this path, the cost is proportional to the length of other only.
+    """
+
+    def __iadd__(self, other: 'Path') -> 'Path':
+        self.__check_joinable(other)
+        self._nodes.extend(other._nodes[1:])
+        self._edges.extend(other._edges)
+        self._target = other._target
+        self._total_cost += other._total_cost
         return self
@@ -0,0 +1,141 @@
+import cProfile
+import json
+import platform
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+from Graph import Graph
+
+"""
+The version of the report format, to be increased when the format changes in an incompatible way
+"""
+REPORT_VERSION = 1
+
+
+class Profiler:
+    """
+    Collect time and memory statistics of the phases of a run (loading, preprocessing, queries, ...)
+    and write them in a JSON report, so that the reports of different versions can be compared.
+
+    Each phase runs under cProfile and tracemalloc. For each phase the report has:
+        - seconds: the wall clock time of the phase
+        - peak_memory_bytes: the peak of the memory traced during the phase, above the memory at its start
+        - net_memory_bytes: the memory still allocated at the end of the phase, above the memory at its start
+        - top_functions: the functions with the highest cumulative time
+        - top_allocations: the source lines that allocated most of the memory still alive at the end of the phase
+    The contraction levels (see profile_contraction_levels) have the time and the memory of each contracted node.
+    """
+
+    def __init__(self, number_of_functions: int = 20, number_of_allocations: int = 10):
+        self._number_of_functions = number_of_functions
+        self._number_of_allocations = number_of_allocations
+        self._phases = []
+        self._contraction_levels = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        memory_at_start = tracemalloc.get_traced_memory()[0]
+        snapshot_at_start = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            seconds = time.perf_counter() - start
+            memory_at_end, peak_memory = tracemalloc.get_traced_memory()
+            snapshot_at_end = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            self._phases.append({
+                'name': name,
+                'seconds': seconds,
+                'peak_memory_bytes': peak_memory - memory_at_start,
+                'net_memory_bytes': memory_at_end - memory_at_start,
+                'top_functions': self.__get_top_functions(profile),
+                'top_allocations': self.__get_top_allocations(snapshot_at_start, snapshot_at_end),
+            })
+
+    def __get_top_functions(self, profile: cProfile.Profile) -> List[Dict[str, Any]]:
+        statistics = pstats.Stats(profile).stats
+        rows = []
+        for (file_name, line, function), (primitive_calls, calls, total_time, cumulative_time, _) \
+                in statistics.items():
+            rows.append({
+                'function': f"{file_name}:{line}({function})",
+                'calls': calls,
+                'total_seconds': total_time,
+                'cumulative_seconds': cumulative_time,
+            })
+        rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+        return rows[:self._number_of_functions]
+
+    def __get_top_allocations(self, snapshot_at_start: tracemalloc.Snapshot,
+                              snapshot_at_end: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        differences = snapshot_at_end.filter_traces(filters).compare_to(
+            snapshot_at_start.filter_traces(filters), 'lineno')
+        rows = []
+        for difference in differences[:self._number_of_allocations]:
+            frame = difference.traceback[0]
+            rows.append({
+                'location': f"{frame.filename}:{frame.lineno}",
+                'size_bytes': difference.size_diff,
+                'count': difference.count_diff,
+            })
+        return rows
+
+    """
+    Contract the graph one node at a time, as Graph.get_contraction_hierarchies does,
+    and record the time and the memory of each level.
+
+    For each level the report has the name of the contracted node, the seconds, the peak and the net memory
+    of the contraction, and the number of nodes and edges of the resulting graph.
+    """
+
+    def profile_contraction_levels(self, graph: Graph):
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        try:
+            for level in range(len(graph) - 1):
+                node_to_remove = graph.find_a_not_important_node()
+                tracemalloc.reset_peak()
+                memory_at_start = tracemalloc.get_traced_memory()[0]
+                start = time.perf_counter()
+                graph = graph.remove_one_node_and_add_his_shortcuts(node_to_remove)
+                seconds = time.perf_counter() - start
+                memory_at_end, peak_memory = tracemalloc.get_traced_memory()
+                self._contraction_levels.append({
+                    'level': level + 1,
+                    'contracted_node': node_to_remove.get_name(),
+                    'seconds': seconds,
+                    'peak_memory_bytes': peak_memory - memory_at_start,
+                    'net_memory_bytes': memory_at_end - memory_at_start,
+                    'nodes': len(graph),
+                    'edges': sum(len(node.get_edges()) for node in graph.get_nodes()),
+                })
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+    def get_report(self) -> Dict[str, Any]:
+        return {
+            'report_version': REPORT_VERSION,
+            'python_version': platform.python_version(),
+            'phases': self._phases,
+            'contraction_levels': self._contraction_levels,
+        }
+
+    def write_report(self, path: str):
+        with open(path, 'w') as file:
+            json.dump(self.get_report(), file, indent=2)
+            file.write('\n')
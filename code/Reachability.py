@@ -0,0 +1,129 @@
+from typing import Dict, List, Set, Tuple
+
+from Node import Node
+
+
+class ReachabilityIndex:
+    """
+    An index that tells quickly when a node surely can not be reached from another node of a graph.
+
+    The nodes are grouped in strongly connected components with an iterative version of the Tarjan algorithm.
+    Tarjan complete the components in reverse topological order, so every edge of the condensation DAG
+    goes from a component to a component with a lower number: a target in a component with a higher number
+    than the source can not be reached, a target in the same component is always reached.
+    The other pairs are not decided by the index, the search finds out.
+    The index store only the component of each node and the edges of the condensation DAG, so its size is linear
+    in the size of the graph. The set of all the components reachable from a source can be computed
+    with a visit of the condensation DAG (see get_reachable_components).
+
+    The index describe the graph at the moment it is built: it records the edges version of the graph
+    (see Graph.get_edges_version) so that the graph can tell when the index is outdated.
+    """
+
+    def __init__(self, nodes: List[Node], edges_version: Tuple[int, int] = (0, 0)):
+        self._edges_version = edges_version
+        self._components = self.__find_strongly_connected_components(nodes)
+        number_of_components = max(self._components.values()) + 1 if len(self._components) > 0 else 0
+
+        successors = [set() for _ in range(number_of_components)]
+        for node in nodes:
+            component = self._components[node.get_name()]
+            for edge in node.get_edges():
+                destination_component = self._components.get(edge.get_destination().get_name())
+                if destination_component is not None and destination_component != component:
+                    successors[component].add(destination_component)
+        self._successors = [list(component_successors) for component_successors in successors]
+
+    """
+    Return the component number of each node name, computed with an iterative Tarjan algorithm
+    """
+
+    @staticmethod
+    def __find_strongly_connected_components(nodes: List[Node]) -> Dict[str, int]:
+        index = {}
+        low_link = {}
+        on_stack = set()
+        stack = []
+        components = {}
+        next_index = 0
+        next_component = 0
+
+        for root in nodes:
+            if root.get_name() in index:
+                continue
+            # each frame of the call stack is a node and the position of the next edge to visit
+            call_stack = [(root, 0)]
+            while len(call_stack) > 0:
+                node, edge_position = call_stack.pop()
+                name = node.get_name()
+                if edge_position == 0:
+                    index[name] = next_index
+                    low_link[name] = next_index
+                    next_index += 1
+                    stack.append(node)
+                    on_stack.add(name)
+
+                edges = node.get_edges()
+                recurse = False
+                while edge_position < len(edges):
+                    destination = edges[edge_position].get_destination()
+                    edge_position += 1
+                    destination_name = destination.get_name()
+                    if destination_name not in index:
+                        call_stack.append((node, edge_position))
+                        call_stack.append((destination, 0))
+                        recurse = True
+                        break
+                    if destination_name in on_stack:
+                        low_link[name] = min(low_link[name], index[destination_name])
+                if recurse:
+                    continue
+
+                if low_link[name] == index[name]:
+                    # node is the root of a component
+                    while True:
+                        member = stack.pop()
+                        on_stack.remove(member.get_name())
+                        components[member.get_name()] = next_component
+                        if member.get_name() == name:
+                            break
+                    next_component += 1
+                if len(call_stack) > 0:
+                    parent_name = call_stack[len(call_stack) - 1][0].get_name()
+                    low_link[parent_name] = min(low_link[parent_name], low_link[name])
+        return components
+
+    def get_number_of_components(self) -> int:
+        return len(self._successors)
+
+    def get_component(self, node: Node) -> int:
+        return self._components[node.get_name()]
+
+    def get_edges_version(self) -> Tuple[int, int]:
+        return self._edges_version
+
+    """
+    Return False when there is surely no path from the source to the target, True when there may be one.
+
+    The answer is exact when the two nodes are in the same component or the target is in a component
+    that comes before the source in the topological order, otherwise it is True and a search is needed.
+    """
+
+    def may_reach(self, source: Node, target: Node) -> bool:
+        # the edges of the condensation DAG only go to components with a lower number
+        return self._components[target.get_name()] <= self._components[source.get_name()]
+
+    """
+    Return the components that can be reached from the source, with a visit of the condensation DAG
+    """
+
+    def get_reachable_components(self, source: Node) -> Set[int]:
+        source_component = self._components[source.get_name()]
+        reachable = {source_component}
+        stack = [source_component]
+        while len(stack) > 0:
+            for successor in self._successors[stack.pop()]:
+                if successor not in reachable:
+                    reachable.add(successor)
+                    stack.append(successor)
+        return reachable